@@ -0,0 +1,61 @@
+"""
+Admission Control - Sheds new chat turns when the system is saturated
+Guest and authenticated traffic have separate in-flight quotas
+"""
+
+from typing import Awaitable, Callable, Dict
+from streaming import Turn
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Turn rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    def __init__(self, llm, db, max_turns: Dict[str, int], max_llm_queue: int = 50,
+                 max_db_saturation: float = 2.0, retry_after: int = 5):
+        self.llm = llm
+        self.db = db
+        self.max_turns = max_turns
+        self.max_llm_queue = max_llm_queue
+        self.max_db_saturation = max_db_saturation
+        self.retry_after = retry_after
+        self.in_flight: Dict[str, int] = {tier: 0 for tier in max_turns}
+        self.admitted: Dict[str, int] = {tier: 0 for tier in max_turns}
+        self.shed: Dict[str, Dict[str, int]] = {tier: {} for tier in max_turns}
+
+    def admit(self, tier: str):
+        reason = None
+        if self.in_flight[tier] >= self.max_turns[tier]:
+            reason = "turns"
+        elif self.llm.waiting >= self.max_llm_queue:
+            reason = "llm_queue"
+        elif self.db.saturation() >= self.max_db_saturation:
+            reason = "db_pool"
+
+        if reason:
+            self.shed[tier][reason] = self.shed[tier].get(reason, 0) + 1
+            raise AdmissionRejected(reason, self.retry_after)
+
+        self.in_flight[tier] += 1
+        self.admitted[tier] += 1
+
+    def track(self, tier: str, producer: Callable[[Turn], Awaitable]) -> Callable[[Turn], Awaitable]:
+        async def tracked(turn: Turn):
+            try:
+                await producer(turn)
+            finally:
+                self.in_flight[tier] -= 1
+        return tracked
+
+    def get_metrics(self) -> Dict:
+        return {
+            tier: {
+                "in_flight": self.in_flight[tier],
+                "max_in_flight": self.max_turns[tier],
+                "admitted": self.admitted[tier],
+                "shed": dict(self.shed[tier])
+            }
+            for tier in self.max_turns
+        }
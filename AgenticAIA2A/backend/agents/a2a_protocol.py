@@ -3,60 +3,272 @@ A2A (Agent-to-Agent) Communication Protocol
 Enables intelligent agents to collaborate and communicate
 """
 
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+from collections import OrderedDict, deque
+import asyncio
+import itertools
 import json
+import os
+import re
+import secrets
+import time
+
+EPOCH = datetime(1970, 1, 1)
+
+def _reset_clock():
+    global _clock_offset, _node_id, _message_counter
+    _clock_offset = time.time_ns() - time.monotonic_ns()
+    _node_id = f"{secrets.randbits(32):08x}"
+    _message_counter = itertools.count()
+
+_reset_clock()
+os.register_at_fork(after_in_child=_reset_clock)
+
+def now_ns() -> int:
+    return time.monotonic_ns() + _clock_offset
+
+def new_message_id(timestamp: int) -> str:
+    return f"{timestamp // 1_000_000:011x}{_node_id}{next(_message_counter) & 0xFFFFFF:06x}"
+
+def to_datetime(timestamp: int) -> datetime:
+    return EPOCH + timedelta(microseconds=timestamp // 1000)
+
+def format_timestamp(timestamp: int) -> str:
+    return to_datetime(timestamp).isoformat()
+
+def parse_timestamp(value: Union[int, str, datetime]) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value.replace(tzinfo=None) - EPOCH) // timedelta(microseconds=1) * 1000
+
+AGENT_PRIORITIES = {
+    "login_agent": 0,
+    "registration_agent": 0,
+    "logout_agent": 0,
+    "profile_agent": 1,
+    "health_agent": 2
+}
+
+class A2AOverloadError(Exception):
+    def __init__(self, agent_id: str, depth: int):
+        super().__init__(f"{agent_id} queue is full ({depth} pending)")
+        self.agent_id = agent_id
+        self.depth = depth
 
 class A2AMessage:
+    __slots__ = (
+        "sender", "receiver", "content", "message_type", "timestamp",
+        "metadata", "message_id", "correlation_id", "priority"
+    )
+    
     def __init__(self, sender: str, receiver: str, content: str, 
-                 message_type: str = "request", metadata: Dict = None):
+                 message_type: str = "request", metadata: Dict = None,
+                 correlation_id: str = None, priority: int = None):
         self.sender = sender
         self.receiver = receiver
         self.content = content
         self.message_type = message_type
-        self.timestamp = datetime.utcnow().isoformat()
+        self.timestamp = now_ns()
         self.metadata = metadata or {}
-        self.message_id = f"{sender}-{int(datetime.utcnow().timestamp() * 1000)}"
+        self.message_id = new_message_id(self.timestamp)
+        self.correlation_id = correlation_id or self.message_id
+        self.priority = AGENT_PRIORITIES.get(receiver, 1) if priority is None else priority
     
     def to_dict(self) -> Dict:
         return {
             "message_id": self.message_id,
+            "correlation_id": self.correlation_id,
             "sender": self.sender,
             "receiver": self.receiver,
-            "timestamp": self.timestamp,
+            "timestamp": format_timestamp(self.timestamp),
             "type": self.message_type,
+            "priority": self.priority,
             "content": self.content,
             "metadata": self.metadata
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "A2AMessage":
+        message = cls(
+            sender=data["sender"],
+            receiver=data["receiver"],
+            content=data["content"],
+            message_type=data.get("type", "request"),
+            metadata=data.get("metadata"),
+            correlation_id=data.get("correlation_id"),
+            priority=data.get("priority")
+        )
+        message.message_id = data["message_id"]
+        message.timestamp = parse_timestamp(data["timestamp"])
+        return message
 
 class A2AChannel:
-    def __init__(self):
+    def __init__(self, max_queue_depth: int = 100, max_concurrency: int = 16, reply_ttl: float = 60):
+        self.max_queue_depth = max_queue_depth
+        self.reply_ttl = reply_ttl
+        self.max_concurrency = max_concurrency
         self.agent_cards: Dict[str, Dict] = {}
-        self.message_queue: Dict[str, List[A2AMessage]] = {}
-        self.conversation_history: Dict[str, List[Dict]] = {}
+        self.handlers: Dict[str, Callable[[A2AMessage], Awaitable[Dict]]] = {}
+        self.factories: Dict[str, Callable] = {}
+        self.agents: Dict[str, object] = {}
+        self.queues: Dict[str, asyncio.PriorityQueue] = {}
+        self.ready: Optional[asyncio.PriorityQueue] = None
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.metrics: Dict[str, Dict] = {}
+        self.conversation_history: Dict[str, deque] = {}
+        self.sequence = itertools.count()
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.running: set = set()
     
-    def register_agent(self, agent_id: str, card: Dict):
+    def register_agent(self, agent_id: str, card: Dict, handler: Callable = None):
         self.agent_cards[agent_id] = card
-        self.message_queue[agent_id] = []
-        self.conversation_history[agent_id] = []
+        self._add_queue(agent_id)
+        if handler:
+            self.handlers[agent_id] = handler
         print(f"✅ Registered: {card['name']}")
     
-    async def send(self, message: A2AMessage):
-        if message.receiver in self.message_queue:
-            self.message_queue[message.receiver].append(message)
-            self.conversation_history[message.receiver].append({
-                "from": message.sender,
-                "to": message.receiver,
-                "content": message.content,
-                "timestamp": message.timestamp,
-                "metadata": message.metadata
-            })
-            print(f"📨 A2A: {message.sender} → {message.receiver}")
-    
-    def get_messages(self, agent_id: str) -> List[A2AMessage]:
-        messages = self.message_queue.get(agent_id, [])
-        self.message_queue[agent_id] = []
-        return messages
+    def register_factory(self, agent_id: str, factory: Callable):
+        self.factories[agent_id] = factory
+    
+    def set_handler(self, agent_id: str, handler: Callable):
+        self._add_queue(agent_id)
+        self.handlers[agent_id] = handler
+    
+    def get_agent(self, agent_id: str):
+        if agent_id not in self.agents and agent_id in self.factories:
+            self.agents[agent_id] = self.factories.pop(agent_id)()
+        return self.agents.get(agent_id)
+    
+    def _add_queue(self, agent_id: str):
+        if agent_id in self.queues:
+            return
+        self.queues[agent_id] = asyncio.PriorityQueue(maxsize=self.max_queue_depth)
+        self.conversation_history[agent_id] = deque(maxlen=50)
+        self.metrics[agent_id] = {
+            "enqueued": 0, "completed": 0, "failed": 0, "rejected": 0,
+            "timed_out": 0, "expired": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0
+        }
+    
+    def _ensure_dispatcher(self):
+        if self.dispatcher:
+            return
+        self.ready = asyncio.PriorityQueue()
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        self.dispatcher = asyncio.create_task(self._dispatch())
+    
+    async def send(self, message: A2AMessage) -> Optional[asyncio.Future]:
+        if message.receiver not in self.handlers:
+            self.get_agent(message.receiver)
+        queue = self.queues.get(message.receiver)
+        if queue is None or message.receiver not in self.handlers:
+            print(f"⚠️ A2A: no handler for {message.receiver}")
+            return None
+        
+        self._ensure_dispatcher()
+        metrics = self.metrics[message.receiver]
+        sequence = next(self.sequence)
+        
+        try:
+            queue.put_nowait((message.priority, sequence, time.monotonic(), message))
+        except asyncio.QueueFull:
+            metrics["rejected"] += 1
+            raise A2AOverloadError(message.receiver, queue.qsize())
+        
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message.correlation_id] = future
+        self.ready.put_nowait((message.priority, sequence, message.receiver))
+        metrics["enqueued"] += 1
+        
+        self.conversation_history[message.receiver].append(message)
+        print(f"📨 A2A: {message.sender} → {message.receiver}")
+        return future
+    
+    async def wait_reply(self, correlation_id: str, timeout: float = 60) -> Optional[Dict]:
+        future = self.pending.get(correlation_id)
+        if future is None:
+            return None
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(correlation_id, None)
+    
+    async def request(self, message: A2AMessage, timeout: float = 60) -> Optional[Dict]:
+        await self.send(message)
+        return await self.wait_reply(message.correlation_id, timeout)
+    
+    async def _dispatch(self):
+        while True:
+            # Take a slot before picking, so the highest-priority message gets the next free one
+            await self.slots.acquire()
+            _, _, agent_id = await self.ready.get()
+            _, _, enqueued_at, message = self.queues[agent_id].get_nowait()
+            
+            metrics = self.metrics[agent_id]
+            wait_ms = (time.monotonic() - enqueued_at) * 1000
+            metrics["total_wait_ms"] += wait_ms
+            metrics["max_wait_ms"] = max(metrics["max_wait_ms"], wait_ms)
+            
+            future = self.pending.get(message.correlation_id)
+            if future is None or future.done():
+                # Nobody is waiting for the reply any more
+                metrics["expired"] += 1
+                self.slots.release()
+                continue
+            
+            task = asyncio.create_task(self._handle(agent_id, message, future))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+            # wait_for cancels the reply future on timeout; stop the handler with it
+            future.add_done_callback(lambda f, task=task: task.cancel() if f.cancelled() else None)
+    
+    async def _handle(self, agent_id: str, message: A2AMessage, future: asyncio.Future):
+        metrics = self.metrics[agent_id]
+        try:
+            result = await self.handlers[agent_id](message)
+            metrics["completed"] += 1
+            if not future.done():
+                future.set_result(result)
+        except asyncio.CancelledError:
+            metrics["timed_out"] += 1
+            raise
+        except Exception as e:
+            metrics["failed"] += 1
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self.slots.release()
+            asyncio.get_running_loop().call_later(
+                self.reply_ttl, self.pending.pop, message.correlation_id, None
+            )
+    
+    async def close(self):
+        if self.dispatcher:
+            self.dispatcher.cancel()
+            self.dispatcher = None
+        for task in list(self.running):
+            task.cancel()
+    
+    def get_metrics(self) -> Dict:
+        stats = {}
+        for agent_id, metrics in self.metrics.items():
+            dequeued = metrics["completed"] + metrics["failed"] + metrics["timed_out"] + metrics["expired"]
+            stats[agent_id] = {
+                "depth": self.queues[agent_id].qsize(),
+                "max_depth": self.max_queue_depth,
+                "enqueued": metrics["enqueued"],
+                "completed": metrics["completed"],
+                "failed": metrics["failed"],
+                "rejected": metrics["rejected"],
+                "timed_out": metrics["timed_out"],
+                "expired": metrics["expired"],
+                "avg_wait_ms": round(metrics["total_wait_ms"] / dequeued, 2) if dequeued else 0.0,
+                "max_wait_ms": round(metrics["max_wait_ms"], 2)
+            }
+        return stats
     
     def get_conversation_context(self, agent_id: str) -> str:
         history = self.conversation_history.get(agent_id, [])
@@ -64,42 +276,233 @@ class A2AChannel:
             return "No previous agent conversations."
         
         context = "AGENT CONVERSATION HISTORY:\n"
-        for msg in history[-5:]:
-            context += f"{msg['from']} → {msg['to']}: {msg['content']}\n"
+        for msg in list(history)[-5:]:
+            context += f"{msg.sender} → {msg.receiver}: {msg.content}\n"
         return context
 
+# Whole-line progress updates only; "Got it! Your account is created" is not filler
+FILLER_PATTERN = re.compile(
+    r"^\W*(?:(?:sure|ok(?:ay)?|no problem|great)\W+)?"
+    r"(?:got it|on it|one moment|hang on|let me log you in|let me check"
+    r"|(?:checking|verifying|processing|working on)(?:\s+\w+){0,3}"
+    r"|(?:logging|signing) you (?:in|out))\W*$",
+    re.IGNORECASE
+)
+
+def is_filler(entry: Dict) -> bool:
+    if entry["role"] == "user":
+        return False
+    text = entry["message"].strip()
+    if FILLER_PATTERN.match(text):
+        return True
+    return len(text) < 60 and text.endswith(("...", "…")) and "?" not in text
+
+CREDENTIAL_PROMPT = re.compile(r"\bpass(?:word|wd)?\b|\bpwd\b|पासवर्ड", re.IGNORECASE)
+
+def holds_credentials(message: str, history: List[Dict]) -> bool:
+    """A user message that names a password, or answers a reply that asked for one."""
+    if CREDENTIAL_PROMPT.search(message):
+        return True
+    for entry in reversed(history):
+        if entry["role"] != "user":
+            return bool(CREDENTIAL_PROMPT.search(entry["message"]))
+    return False
+
+GUEST_PREFIX = "guest:"
+
+def new_guest_id() -> str:
+    return GUEST_PREFIX + secrets.token_hex(16)
+
+def is_guest(session_id: Optional[str]) -> bool:
+    return not session_id or session_id == "guest" or session_id.startswith(GUEST_PREFIX)
+
 class ChatTranscript:
-    def __init__(self):
-        self.transcripts: Dict[str, List[Dict]] = {}
+    def __init__(self, store=None, max_messages: int = 20, max_active_sessions: int = 500,
+                 idle_timeout: float = 1800, summary_window: int = 8, max_guest_turns: int = 8,
+                 max_guest_sessions: int = 200, guest_idle_timeout: float = 300):
+        self.store = store
+        self.max_messages = max_messages
+        self.max_active_sessions = max_active_sessions
+        self.idle_timeout = idle_timeout
+        self.summary_window = summary_window
+        self.max_guest_turns = max_guest_turns
+        self.max_guest_sessions = max_guest_sessions
+        self.guest_idle_timeout = guest_idle_timeout
+        self.transcripts: OrderedDict = OrderedDict()
+        self.guest_transcripts: OrderedDict = OrderedDict()
+        self.summaries: Dict[str, str] = {}
+        self.last_active: Dict[str, float] = {}
+    
+    async def activate(self, session_id: str, persist: bool = False):
+        if not session_id:
+            session_id = "guest"
+        
+        # Only validated sessions are persisted; any other id stays in the memory-only guest tier
+        persist = persist and not is_guest(session_id)
+        tier, other = ((self.transcripts, self.guest_transcripts) if persist
+                       else (self.guest_transcripts, self.transcripts))
+        if session_id in other:
+            del other[session_id]
+            self.summaries.pop(session_id, None)
+        
+        if session_id not in tier:
+            history = []
+            summary = ""
+            if self.store and persist:
+                try:
+                    summary = await self.store.load_summary(session_id)
+                    limit = self.summary_window if summary else self.max_messages
+                    history = await self.store.load_recent(session_id, limit)
+                except Exception as e:
+                    print(f"❌ Transcript load error: {e}")
+            tier.setdefault(session_id, history)
+            if summary:
+                self.summaries.setdefault(session_id, summary)
+        
+        self._touch(session_id)
+        self._page_out()
+    
+    def _tier(self, session_id: str) -> OrderedDict:
+        return self.transcripts if session_id in self.transcripts else self.guest_transcripts
+    
+    def _touch(self, session_id: str):
+        self._tier(session_id).move_to_end(session_id)
+        self.last_active[session_id] = time.monotonic()
+    
+    def _page_out(self):
+        now = time.monotonic()
+        for tier, max_sessions, idle_timeout in (
+            (self.transcripts, self.max_active_sessions, self.idle_timeout),
+            (self.guest_transcripts, self.max_guest_sessions, self.guest_idle_timeout)
+        ):
+            while tier:
+                oldest = next(iter(tier))
+                if len(tier) <= max_sessions and self.last_active[oldest] > now - idle_timeout:
+                    break
+                del tier[oldest]
+                del self.last_active[oldest]
+                self.summaries.pop(oldest, None)
     
     def add_message(self, session_id: str, role: str, message: str, agent: str = None):
         if not session_id:
             session_id = "guest"
         
-        if session_id not in self.transcripts:
-            self.transcripts[session_id] = []
+        tier = self._tier(session_id)
+        if session_id not in tier:
+            tier[session_id] = []
+        self._touch(session_id)
         
-        self.transcripts[session_id].append({
-            "timestamp": datetime.utcnow().isoformat(),
+        entry = {
+            "timestamp": now_ns(),
             "role": role,
             "message": message,
             "agent": agent
-        })
+        }
+        if role == "user" and holds_credentials(message, tier[session_id]):
+            entry["sensitive"] = True
+        tier[session_id].append(entry)
+        
+        if tier is self.guest_transcripts:
+            if role == "user":
+                self._trim_guest(session_id)
+            return
         
-        if len(self.transcripts[session_id]) > 20:
-            self.transcripts[session_id] = self.transcripts[session_id][-20:]
+        if self.store:
+            self.store.append(session_id, entry)
+        
+        if len(tier[session_id]) > self.max_messages:
+            tier[session_id] = tier[session_id][-self.max_messages:]
+    
+    def _trim_guest(self, session_id: str):
+        # Guests are not summarised, so keep whole turns: a turn is one user message
+        # plus 4-8 agent messages, and registration collects one field per turn
+        history = self.guest_transcripts[session_id]
+        turns = 0
+        for index in range(len(history) - 1, -1, -1):
+            if history[index]["role"] == "user":
+                turns += 1
+                if turns > self.max_guest_turns:
+                    self.guest_transcripts[session_id] = history[index + 1:]
+                    return
+    
+    def promote(self, guest_id: str, session_id: str):
+        # Credentials typed before login are not carried into the persisted session
+        history = [entry for entry in self.guest_transcripts.pop(guest_id, []) if not entry.get("sensitive")]
+        summary = self.summaries.pop(guest_id, None)
+        self.last_active.pop(guest_id, None)
+        if not history and not summary:
+            return
+        
+        self.transcripts[session_id] = history + self.transcripts.get(session_id, [])
+        if summary:
+            self.summaries[session_id] = summary
+        self._touch(session_id)
+        
+        if self.store:
+            for entry in history:
+                self.store.append(session_id, entry)
+            if summary:
+                self.store.save_summary(session_id, summary)
+        self._page_out()
+    
+    def pop_transcript(self, session_id: str) -> List[Dict]:
+        session_id = session_id or "guest"
+        self.last_active.pop(session_id, None)
+        return self._tier(session_id).pop(session_id, [])
+    
+    def get_foldable(self, session_id: str) -> List[Dict]:
+        if not session_id:
+            session_id = "guest"
+        
+        history = self._tier(session_id).get(session_id, [])
+        kept = 0
+        for index in range(len(history) - 1, -1, -1):
+            if not is_filler(history[index]):
+                kept += 1
+                if kept == self.summary_window:
+                    return history[:index]
+        return []
+    
+    def get_summary(self, session_id: str) -> str:
+        return self.summaries.get(session_id or "guest", "")
+    
+    def fold(self, session_id: str, folded: List[Dict], summary: str):
+        if not session_id:
+            session_id = "guest"
+        
+        tier = self._tier(session_id)
+        folded_ids = {id(entry) for entry in folded}
+        if session_id in tier:
+            tier[session_id] = [entry for entry in tier[session_id] if id(entry) not in folded_ids]
+        self.summaries[session_id] = summary
+        
+        if self.store and tier is self.transcripts:
+            self.store.save_summary(session_id, summary)
     
     def get_context(self, session_id: str) -> str:
         if not session_id:
             session_id = "guest"
         
-        if session_id not in self.transcripts:
+        history = [msg for msg in self._tier(session_id).get(session_id, []) if not is_filler(msg)]
+        summary = self.summaries.get(session_id)
+        
+        if not history and not summary:
             return "No previous conversation."
         
-        context = "PREVIOUS CONVERSATION:\n"
-        for msg in self.transcripts[session_id][-10:]:
-            role = "USER" if msg["role"] == "user" else "AI"
-            agent_info = f" ({msg['agent']})" if msg.get("agent") else ""
-            context += f"{role}{agent_info}: {msg['message']}\n"
+        context = f"CONVERSATION SUMMARY: {summary}\n" if summary else ""
+        
+        recent = self.max_guest_turns if session_id not in self.transcripts else 4
+        user_messages = [msg for msg in history if msg["role"] == "user"][-recent:]
+        if user_messages:
+            context += "RECENT USER MESSAGES:\n"
+            for msg in user_messages:
+                context += f"USER: {msg['message']}\n"
+        
+        replies = [msg for msg in history if msg["role"] != "user"]
+        if replies:
+            context += f"LAST AI REPLY: {replies[-1]['message']}\n"
         
         return context
+    
+    def get_metrics(self) -> Dict:
+        return {"sessions": len(self.transcripts), "guests": len(self.guest_transcripts)}
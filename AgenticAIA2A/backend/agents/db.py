@@ -0,0 +1,60 @@
+"""
+Database - Shared asyncpg connection pool with saturation tracking
+"""
+
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+import asyncio
+import asyncpg
+from .tracing import trace_connection
+
+class Database:
+    def __init__(self, db_url: str, min_size: int = 1, max_size: int = 10):
+        self.db_url = db_url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool: Optional[asyncpg.Pool] = None
+        self.pool_lock = asyncio.Lock()
+        self.in_use = 0
+        self.waiting = 0
+
+    async def get_pool(self) -> asyncpg.Pool:
+        if self.pool is None:
+            async with self.pool_lock:
+                if self.pool is None:
+                    self.pool = await asyncpg.create_pool(
+                        self.db_url, min_size=self.min_size, max_size=self.max_size
+                    )
+        return self.pool
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            pool = await self.get_pool()
+            conn = await pool.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_use += 1
+        try:
+            yield trace_connection(conn)
+        finally:
+            self.in_use -= 1
+            await pool.release(conn)
+
+    def saturation(self) -> float:
+        return (self.in_use + self.waiting) / self.max_size
+
+    def get_metrics(self) -> Dict:
+        return {
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_size": self.max_size,
+            "saturation": round(self.saturation(), 2)
+        }
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
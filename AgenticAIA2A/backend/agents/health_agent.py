@@ -5,13 +5,18 @@ Health Agent - Provides health tips and answers questions
 from typing import Dict
 import json
 from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from .templates import TemplateEngine, default_templates
+from .tracing import traced
+from .usage import metered
 
 class HealthAgent:
-    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript):
+    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript,
+                 templates: TemplateEngine = None):
         self.agent_id = "health_agent"
         self.channel = channel
         self.ai_client = ai_client
         self.transcript = transcript
+        self.templates = templates or default_templates
         
         self.system_prompt = """You are the HEALTH SPECIALIST agent for ABC+ Fit Banker.
 
@@ -51,21 +56,11 @@ Generate 2-4 streaming messages per response."""
             "description": "Provides health tips and advice",
             "capabilities": ["Health advice", "Nutrition guidance", "Fitness tips"]
         }
-        channel.register_agent(self.agent_id, self.card)
+        channel.register_agent(self.agent_id, self.card, self.process_with_streaming)
     
-    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
-        session = a2a_message.metadata.get("session", {})
+    def llm_request(self, a2a_message: A2AMessage) -> Dict:
         user_msg = a2a_message.metadata.get("original_user_message", "")
         chat_context = a2a_message.metadata.get("chat_context", "")
-        session_id = a2a_message.metadata.get("session_id")
-        
-        if not session or not session.get("user_id"):
-            return {
-                "stream_messages": [{
-                    "content": "You need to be logged in to get personalized health advice."
-                }],
-                "status": "auth_required"
-            }
         
         context = f"""
 MAIN AGENT REQUEST: {a2a_message.content}
@@ -75,17 +70,36 @@ CHAT HISTORY: {chat_context}
 Provide helpful health advice. Generate 2-4 streaming messages for natural flow.
 """
         
-        response = await self.ai_client.chat.completions.create(
-            model="openai/gpt-3.5-turbo",
-            messages=[
+        return {
+            "model": "openai/gpt-3.5-turbo",
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": context}
             ],
-            temperature=0.7,
-            max_tokens=400
-        )
+            "temperature": 0.7,
+            "max_tokens": 400
+        }
+    
+    @traced
+    @metered
+    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
+        session = a2a_message.metadata.get("session", {})
+        user_msg = a2a_message.metadata.get("original_user_message", "")
+        chat_context = a2a_message.metadata.get("chat_context", "")
+        session_id = a2a_message.metadata.get("session_id")
+        
+        if not session or not session.get("user_id"):
+            return {
+                "stream_messages": self.templates.render(
+                    self.agent_id, "auth_required", a2a_message.metadata.get("locale")
+                ),
+                "status": "auth_required"
+            }
+        
+        response = await self.ai_client.chat.completions.create(**self.llm_request(a2a_message))
         
         result = response.choices[0].message.content
+        self.templates.record(self.agent_id, "llm")
         
         try:
             decision = json.loads(result)
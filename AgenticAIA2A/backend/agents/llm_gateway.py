@@ -0,0 +1,79 @@
+"""
+LLM Gateway - Bounds concurrent model calls and tracks the waiting queue
+Exposes the same chat.completions.create interface as the OpenAI client
+"""
+
+from types import SimpleNamespace
+from typing import Callable, Dict
+import asyncio
+import hashlib
+import json
+import time
+from .tracing import record_llm
+from .usage import UsageTracker, current_caller
+
+def request_key(request: Dict) -> str:
+    return hashlib.sha1(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+class LLMGateway:
+    def __init__(self, client=None, max_concurrency: int = 16, client_factory: Callable = None,
+                 usage: UsageTracker = None):
+        self._client = client
+        self.client_factory = client_factory
+        self.max_concurrency = max_concurrency
+        self.usage = usage
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.prefetched: Dict = {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    async def create(self, **kwargs):
+        started = time.perf_counter()
+        speculation = self.prefetched.pop(request_key(kwargs), None) if self.prefetched else None
+        if speculation is not None:
+            response = await speculation.claim()
+            record_llm(kwargs, response, started)
+            return response
+
+        caller = current_caller.get()
+        if self.usage:
+            kwargs = await self.usage.apply_budget(caller, kwargs)
+
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            response = await self.client.chat.completions.create(**kwargs)
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+        if self.usage:
+            self.usage.record(caller, kwargs.get("model"), getattr(response, "usage", None))
+        record_llm(kwargs, response, started)
+        return response
+
+    def get_metrics(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "calls": self.calls
+        }
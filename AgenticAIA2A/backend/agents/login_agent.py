@@ -6,17 +6,22 @@ from typing import Dict
 import json
 import hashlib
 import secrets
-import asyncpg
 from datetime import datetime, timedelta
 from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from .db import Database
+from .templates import TemplateEngine, default_templates, detect_static_intent
+from .tracing import traced
+from .usage import metered
 
 class LoginAgent:
-    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db_url: str):
+    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db: Database,
+                 templates: TemplateEngine = None):
         self.agent_id = "login_agent"
         self.channel = channel
         self.ai_client = ai_client
         self.transcript = transcript
-        self.db_url = db_url
+        self.db = db
+        self.templates = templates or default_templates
         
         self.system_prompt = """You are the LOGIN SPECIALIST agent.
 
@@ -56,13 +61,11 @@ Be encouraging!"""
             "description": "Handles authentication with streaming",
             "capabilities": ["Authentication", "Session management"]
         }
-        channel.register_agent(self.agent_id, self.card)
+        channel.register_agent(self.agent_id, self.card, self.process_with_streaming)
     
-    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
-        session = a2a_message.metadata.get("session", {})
+    def llm_request(self, a2a_message: A2AMessage) -> Dict:
         user_msg = a2a_message.metadata.get("original_user_message", "")
         chat_context = a2a_message.metadata.get("chat_context", "")
-        session_id = a2a_message.metadata.get("session_id")
         
         context = f"""
 MAIN AGENT REQUEST: {a2a_message.content}
@@ -73,17 +76,39 @@ Check if you have email/phone and password. If yes, set status to "verifying".
 Generate 3-4 streaming messages for engaging login flow.
 """
         
-        response = await self.ai_client.chat.completions.create(
-            model="openai/gpt-3.5-turbo",
-            messages=[
+        return {
+            "model": "openai/gpt-3.5-turbo",
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": context}
             ],
-            temperature=0.7,
-            max_tokens=300
-        )
+            "temperature": 0.7,
+            "max_tokens": 300
+        }
+    
+    @traced
+    @metered
+    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
+        session = a2a_message.metadata.get("session", {})
+        user_msg = a2a_message.metadata.get("original_user_message", "")
+        chat_context = a2a_message.metadata.get("chat_context", "")
+        session_id = a2a_message.metadata.get("session_id")
+        
+        if detect_static_intent(user_msg) == "login":
+            decision = {
+                "stream_messages": self.templates.render(
+                    self.agent_id, "collecting", a2a_message.metadata.get("locale")
+                ),
+                "status": "collecting"
+            }
+            for msg in decision["stream_messages"]:
+                self.transcript.add_message(session_id, "assistant", msg["content"], "main_agent")
+            return decision
+        
+        response = await self.ai_client.chat.completions.create(**self.llm_request(a2a_message))
         
         result = response.choices[0].message.content
+        self.templates.record(self.agent_id, "llm")
         
         try:
             decision = json.loads(result)
@@ -97,25 +122,24 @@ Generate 3-4 streaming messages for engaging login flow.
             creds = decision["verify_credentials"]
             
             try:
-                conn = await asyncpg.connect(self.db_url)
                 password_hash = hashlib.sha256(creds["password"].encode()).hexdigest()
                 
-                user = await conn.fetchrow('''
-                    SELECT user_id, name, email FROM users
-                    WHERE (email = $1 OR phone = $1) AND password_hash = $2
-                ''', creds["identifier"], password_hash)
+                async with self.db.acquire() as conn:
+                    user = await conn.fetchrow('''
+                        SELECT user_id, name, email FROM users
+                        WHERE (email = $1 OR phone = $1) AND password_hash = $2
+                    ''', creds["identifier"], password_hash)
+                    
+                    if user:
+                        new_session_id = secrets.token_urlsafe(32)
+                        expires_at = datetime.utcnow() + timedelta(days=30)
+                        
+                        await conn.execute('''
+                            INSERT INTO sessions (session_id, user_id, expires_at)
+                            VALUES ($1, $2, $3)
+                        ''', new_session_id, user["user_id"], expires_at)
                 
                 if user:
-                    new_session_id = secrets.token_urlsafe(32)
-                    expires_at = datetime.utcnow() + timedelta(days=30)
-                    
-                    await conn.execute('''
-                        INSERT INTO sessions (session_id, user_id, expires_at)
-                        VALUES ($1, $2, $3)
-                    ''', new_session_id, user["user_id"], expires_at)
-                    
-                    await conn.close()
-                    
                     decision["stream_messages"].append({
                         "content": f"✅ Login successful! Welcome back, {user['name'] or 'there'}! 🎉"
                     })
@@ -123,7 +147,6 @@ Generate 3-4 streaming messages for engaging login flow.
                     decision["session_id"] = new_session_id
                     decision["user_id"] = user["user_id"]
                 else:
-                    await conn.close()
                     decision["stream_messages"] = [
                         {"content": "❌ Invalid credentials. Please check your email and password."}
                     ]
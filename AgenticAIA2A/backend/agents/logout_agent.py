@@ -4,16 +4,21 @@ Logout Agent - Handles user logout
 
 from typing import Dict
 import json
-import asyncpg
-from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript, is_guest
+from .db import Database
+from .templates import TemplateEngine, default_templates
+from .tracing import traced
+from .usage import metered
 
 class LogoutAgent:
-    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db_url: str):
+    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db: Database,
+                 templates: TemplateEngine = None):
         self.agent_id = "logout_agent"
         self.channel = channel
         self.ai_client = ai_client
         self.transcript = transcript
-        self.db_url = db_url
+        self.db = db
+        self.templates = templates or default_templates
         
         self.system_prompt = """You are the LOGOUT SPECIALIST agent.
 
@@ -39,24 +44,24 @@ Be warm and encouraging!"""
             "description": "Handles logout",
             "capabilities": ["Session termination"]
         }
-        channel.register_agent(self.agent_id, self.card)
+        channel.register_agent(self.agent_id, self.card, self.process_with_streaming)
     
+    @traced
+    @metered
     async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
         session_id = a2a_message.metadata.get("session_id")
         
         decision = {
-            "stream_messages": [
-                {"content": "Logging you out..."},
-                {"content": "✅ You've been logged out successfully. Take care!"}
-            ],
+            "stream_messages": self.templates.render(
+                self.agent_id, "logged_out", a2a_message.metadata.get("locale")
+            ),
             "status": "logged_out"
         }
         
-        if session_id:
+        if not is_guest(session_id):
             try:
-                conn = await asyncpg.connect(self.db_url)
-                await conn.execute('DELETE FROM sessions WHERE session_id = $1', session_id)
-                await conn.close()
+                async with self.db.acquire() as conn:
+                    await conn.execute('DELETE FROM sessions WHERE session_id = $1', session_id)
             except Exception:
                 pass
         
@@ -3,16 +3,38 @@ Main Agent - The Boss
 Coordinates all specialist agents and manages user interaction with streaming responses
 """
 
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Awaitable, Dict, List, Optional, Tuple
+import asyncio
 import json
-from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from .a2a_protocol import A2AChannel, A2AMessage, A2AOverloadError, ChatTranscript
+from .serializer import serializer
+from .speculation import Speculator
+from .templates import TemplateEngine, default_templates, detect_static_intent
+from .tracing import traced
+from .usage import Caller, UsageTracker, metered
+
+STATIC_ROUTES = {
+    "login": ("login_agent", "route_login"),
+    "register": ("registration_agent", "route_registration"),
+    "logout": ("logout_agent", "route_logout")
+}
+AUTH_AGENTS = ("login_agent", "registration_agent")
+FINISHED_STATUSES = {"success", "created"}
 
 class MainAgent:
-    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript):
+    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript,
+                 templates: TemplateEngine = None, speculator: Speculator = None, usage: UsageTracker = None,
+                 max_sessions: int = 10000):
         self.agent_id = "main_agent"
         self.channel = channel
         self.ai_client = ai_client
         self.transcript = transcript
+        self.templates = templates or default_templates
+        self.speculator = speculator
+        self.usage = usage
+        self.max_sessions = max_sessions
+        self.auth_flows: OrderedDict = OrderedDict()
         
         self.system_prompt = """You are the MAIN BOSS AGENT for ABC+ Fit Banker health chatbot.
 
@@ -76,9 +98,177 @@ PERSONALITY: Friendly, warm, encouraging. Use emojis sparingly."""
         }
         channel.register_agent(self.agent_id, self.card)
     
-    async def process_with_streaming(self, user_message: str, session_data: Dict, session_id: str = None) -> Dict:
-        session_info = json.dumps(session_data, indent=2) if session_data else "No active session"
+    @traced
+    @metered
+    async def process_with_streaming(self, user_message: str, session_data: Dict, session_id: str = None,
+                                     correlation_id: str = None, locale: str = None,
+                                     session_lookup: Awaitable = None) -> Dict:
         chat_context = self.transcript.get_context(session_id)
+        decision, session_data = await self.decide(
+            user_message, session_data, session_id, correlation_id, chat_context, locale, session_lookup
+        )
+        
+        for msg in decision["stream_messages"]:
+            self.transcript.add_message(session_id, "assistant", msg["content"], "main_agent")
+        
+        if decision["action"] == "route":
+            target_agent = decision["to_agent"]
+            
+            a2a_msg = self.route_message(
+                target_agent, decision.get("message", user_message), user_message,
+                session_data, chat_context, session_id, locale, correlation_id
+            )
+            if self.speculator:
+                self.speculator.settle(correlation_id, a2a_msg)
+            
+            try:
+                await self.channel.send(a2a_msg)
+            except A2AOverloadError:
+                busy = "I'm handling a lot of requests right now. Please try again in a moment."
+                self.transcript.add_message(session_id, "assistant", busy, "main_agent")
+                return {
+                    "stream_messages": decision["stream_messages"] + [{"content": busy}],
+                    "from_agent": "main_agent",
+                    "overloaded": True
+                }
+            
+            return {
+                "routed_to": target_agent,
+                "correlation_id": a2a_msg.correlation_id,
+                "stream_messages": decision["stream_messages"]
+            }
+        
+        return {
+            "stream_messages": decision["stream_messages"],
+            "from_agent": "main_agent"
+        }
+    
+    def route_message(self, target_agent: str, content: str, user_message: str, session_data: Dict,
+                      chat_context: str, session_id: str, locale: str, correlation_id: str) -> A2AMessage:
+        return A2AMessage(
+            sender=self.agent_id,
+            receiver=target_agent,
+            content=content,
+            metadata={
+                "session": session_data,
+                "original_user_message": user_message,
+                "chat_context": chat_context,
+                "session_id": session_id,
+                "locale": locale
+            },
+            correlation_id=correlation_id
+        )
+    
+    async def decide(self, user_message: str, session_data: Dict, session_id: str, correlation_id: str,
+                     chat_context: str, locale: str, session_lookup: Awaitable = None) -> Tuple[Dict, Optional[Dict]]:
+        if session_lookup is not None:
+            known, predicted = self.speculator.known_session(session_id)
+            if (known and not detect_static_intent(user_message)
+                    and await self.budget_tier(session_id, predicted) != "templates"):
+                return await self.speculative_decision(
+                    user_message, predicted, session_lookup, session_id, correlation_id, chat_context, locale
+                )
+            session_data = await session_lookup
+            self.speculator.remember_session(session_id, session_data)
+        
+        decision = self.static_decision(user_message, session_data, locale)
+        if decision is None and await self.budget_tier(session_id, session_data) == "templates":
+            decision = self.budget_decision(session_id, session_data, locale)
+        if decision is None:
+            self.speculate(user_message, session_data, session_id, correlation_id, chat_context, locale)
+            decision = await self.llm_decision(user_message, session_data, chat_context)
+        return decision, session_data
+    
+    async def speculative_decision(self, user_message: str, predicted: Optional[Dict], session_lookup: Awaitable,
+                                   session_id: str, correlation_id: str, chat_context: str,
+                                   locale: str) -> Tuple[Dict, Optional[Dict]]:
+        self.speculate(user_message, predicted, session_id, correlation_id, chat_context, locale)
+        routing = self.speculator.start_routing(
+            self.ai_client.chat.completions.create(**self.routing_request(user_message, predicted, chat_context))
+        )
+        try:
+            session_data = await session_lookup
+        except BaseException:
+            self.speculator.discard_routing(routing)
+            raise
+        
+        self.speculator.remember_session(session_id, session_data)
+        if self.speculator.check_session(predicted, session_data):
+            return self.parse_decision(await routing), session_data
+        
+        self.speculator.discard_routing(routing)
+        return await self.llm_decision(user_message, session_data, chat_context), session_data
+    
+    def budget_decision(self, session_id: str, session_data: Optional[Dict], locale: str) -> Dict:
+        flow = self.auth_flow(session_id)
+        if flow and not (session_data and session_data.get("user_id")):
+            # Credentials mid-login/registration skip the routing call; the specialist runs on the fallback model
+            return {"action": "route", "to_agent": flow, "stream_messages": []}
+        
+        self.usage.template_only += 1
+        return {
+            "action": "respond",
+            "stream_messages": self.templates.render(self.agent_id, "budget_exceeded", locale)
+        }
+    
+    async def budget_tier(self, session_id: str, session_data: Optional[Dict]) -> str:
+        if self.usage is None:
+            return "full"
+        return await self.usage.tier(Caller(self.agent_id, session_id, (session_data or {}).get("user_id")))
+    
+    def speculate(self, user_message: str, session_data: Dict, session_id: str, correlation_id: str,
+                  chat_context: str, locale: str):
+        if not self.speculator or not correlation_id:
+            return
+        
+        target_agent = self.speculator.predict(session_id)
+        if target_agent:
+            self.speculator.start(correlation_id, self.route_message(
+                target_agent, user_message, user_message, session_data, chat_context, session_id, locale, correlation_id
+            ))
+    
+    def observe(self, session_id: Optional[str], agent_id: Optional[str], status: Optional[str]):
+        """Track sessions part-way through login or registration; their next turn may be a bare password."""
+        if not session_id:
+            return
+        if agent_id in AUTH_AGENTS and status not in FINISHED_STATUSES:
+            self.auth_flows[session_id] = agent_id
+            self.auth_flows.move_to_end(session_id)
+            if len(self.auth_flows) > self.max_sessions:
+                self.auth_flows.popitem(last=False)
+        else:
+            self.auth_flows.pop(session_id, None)
+    
+    def auth_flow(self, session_id: Optional[str]) -> Optional[str]:
+        return self.auth_flows.get(session_id)
+    
+    def static_decision(self, user_message: str, session_data: Dict, locale: str = None):
+        intent = detect_static_intent(user_message)
+        authenticated = bool(session_data and session_data.get("user_id"))
+        
+        if intent == "logout" or (intent in STATIC_ROUTES and not authenticated):
+            target_agent, status = STATIC_ROUTES[intent]
+            return {
+                "action": "route",
+                "to_agent": target_agent,
+                "stream_messages": self.templates.render(self.agent_id, status, locale)
+            }
+        
+        if intent in ("health", "profile") and not authenticated:
+            return {
+                "action": "respond",
+                "stream_messages": self.templates.render(self.agent_id, "auth_required", locale)
+            }
+        return None
+    
+    async def llm_decision(self, user_message: str, session_data: Dict, chat_context: str) -> Dict:
+        response = await self.ai_client.chat.completions.create(
+            **self.routing_request(user_message, session_data, chat_context)
+        )
+        return self.parse_decision(response)
+    
+    def routing_request(self, user_message: str, session_data: Dict, chat_context: str) -> Dict:
+        session_info = serializer.dumps(session_data).decode() if session_data else "No active session"
         
         context = f"""
 USER MESSAGE: {user_message}
@@ -90,17 +280,19 @@ CHAT HISTORY: {chat_context}
 Decide what to do and generate 2-4 progressive streaming messages.
 """
         
-        response = await self.ai_client.chat.completions.create(
-            model="openai/gpt-3.5-turbo",
-            messages=[
+        return {
+            "model": "openai/gpt-3.5-turbo",
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": context}
             ],
-            temperature=0.7,
-            max_tokens=300
-        )
-        
+            "temperature": 0.7,
+            "max_tokens": 300
+        }
+    
+    def parse_decision(self, response) -> Dict:
         decision_text = response.choices[0].message.content
+        self.templates.record(self.agent_id, "llm")
         
         try:
             decision = json.loads(decision_text)
@@ -112,33 +304,5 @@ Decide what to do and generate 2-4 progressive streaming messages.
         
         if not decision.get("stream_messages"):
             decision["stream_messages"] = [{"content": decision.get("message", "I'm here to help!")}]
-        
-        for msg in decision["stream_messages"]:
-            self.transcript.add_message(session_id, "assistant", msg["content"], "main_agent")
-        
-        if decision["action"] == "route":
-            target_agent = decision["to_agent"]
-            
-            a2a_msg = A2AMessage(
-                sender=self.agent_id,
-                receiver=target_agent,
-                content=decision.get("message", user_message),
-                metadata={
-                    "session": session_data,
-                    "original_user_message": user_message,
-                    "chat_context": chat_context,
-                    "session_id": session_id
-                }
-            )
-            
-            await self.channel.send(a2a_msg)
-            
-            return {
-                "routed_to": target_agent,
-                "stream_messages": decision["stream_messages"]
-            }
-        
-        return {
-            "stream_messages": decision["stream_messages"],
-            "from_agent": "main_agent"
-        }
+        decision.setdefault("action", "respond")
+        return decision
@@ -4,16 +4,21 @@ Profile Agent - Manages user health profiles
 
 from typing import Dict
 import json
-import asyncpg
 from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from .db import Database
+from .templates import TemplateEngine, default_templates
+from .tracing import traced
+from .usage import metered
 
 class ProfileAgent:
-    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db_url: str):
+    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db: Database,
+                 templates: TemplateEngine = None):
         self.agent_id = "profile_agent"
         self.channel = channel
         self.ai_client = ai_client
         self.transcript = transcript
-        self.db_url = db_url
+        self.db = db
+        self.templates = templates or default_templates
         
         self.system_prompt = """You are the PROFILE SPECIALIST agent.
 
@@ -49,21 +54,11 @@ Be supportive and health-focused!"""
             "description": "Manages health profiles",
             "capabilities": ["Profile management", "Health data collection"]
         }
-        channel.register_agent(self.agent_id, self.card)
+        channel.register_agent(self.agent_id, self.card, self.process_with_streaming)
     
-    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
-        session = a2a_message.metadata.get("session", {})
+    def llm_request(self, a2a_message: A2AMessage) -> Dict:
         user_msg = a2a_message.metadata.get("original_user_message", "")
         chat_context = a2a_message.metadata.get("chat_context", "")
-        session_id = a2a_message.metadata.get("session_id")
-        
-        if not session or not session.get("user_id"):
-            return {
-                "stream_messages": [{
-                    "content": "You need to be logged in to manage your profile."
-                }],
-                "status": "auth_required"
-            }
         
         context = f"""
 MAIN AGENT REQUEST: {a2a_message.content}
@@ -73,17 +68,36 @@ CHAT HISTORY: {chat_context}
 Extract profile data from chat. Generate 2-3 streaming messages.
 """
         
-        response = await self.ai_client.chat.completions.create(
-            model="openai/gpt-3.5-turbo",
-            messages=[
+        return {
+            "model": "openai/gpt-3.5-turbo",
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": context}
             ],
-            temperature=0.7,
-            max_tokens=300
-        )
+            "temperature": 0.7,
+            "max_tokens": 300
+        }
+    
+    @traced
+    @metered
+    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
+        session = a2a_message.metadata.get("session", {})
+        user_msg = a2a_message.metadata.get("original_user_message", "")
+        chat_context = a2a_message.metadata.get("chat_context", "")
+        session_id = a2a_message.metadata.get("session_id")
+        
+        if not session or not session.get("user_id"):
+            return {
+                "stream_messages": self.templates.render(
+                    self.agent_id, "auth_required", a2a_message.metadata.get("locale")
+                ),
+                "status": "auth_required"
+            }
+        
+        response = await self.ai_client.chat.completions.create(**self.llm_request(a2a_message))
         
         result = response.choices[0].message.content
+        self.templates.record(self.agent_id, "llm")
         
         try:
             decision = json.loads(result)
@@ -97,31 +111,28 @@ Extract profile data from chat. Generate 2-3 streaming messages.
             profile_data = decision["profile_data"]
             
             try:
-                conn = await asyncpg.connect(self.db_url)
-                
-                await conn.execute('''
-                    INSERT INTO user_profiles 
-                    (user_id, age, gender, height_cm, weight_kg, activity_level, 
-                     diet_preference, health_goals, health_conditions)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        age = EXCLUDED.age,
-                        gender = EXCLUDED.gender,
-                        height_cm = EXCLUDED.height_cm,
-                        weight_kg = EXCLUDED.weight_kg,
-                        activity_level = EXCLUDED.activity_level,
-                        diet_preference = EXCLUDED.diet_preference,
-                        health_goals = EXCLUDED.health_goals,
-                        health_conditions = EXCLUDED.health_conditions,
-                        updated_at = CURRENT_TIMESTAMP
-                ''', session["user_id"], profile_data.get("age"), 
-                    profile_data.get("gender"), profile_data.get("height_cm"),
-                    profile_data.get("weight_kg"), profile_data.get("activity_level"),
-                    profile_data.get("diet_preference"), 
-                    profile_data.get("health_goals", []),
-                    profile_data.get("health_conditions", []))
-                
-                await conn.close()
+                async with self.db.acquire() as conn:
+                    await conn.execute('''
+                        INSERT INTO user_profiles 
+                        (user_id, age, gender, height_cm, weight_kg, activity_level, 
+                         diet_preference, health_goals, health_conditions)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                        ON CONFLICT (user_id) DO UPDATE SET
+                            age = EXCLUDED.age,
+                            gender = EXCLUDED.gender,
+                            height_cm = EXCLUDED.height_cm,
+                            weight_kg = EXCLUDED.weight_kg,
+                            activity_level = EXCLUDED.activity_level,
+                            diet_preference = EXCLUDED.diet_preference,
+                            health_goals = EXCLUDED.health_goals,
+                            health_conditions = EXCLUDED.health_conditions,
+                            updated_at = CURRENT_TIMESTAMP
+                    ''', session["user_id"], profile_data.get("age"), 
+                        profile_data.get("gender"), profile_data.get("height_cm"),
+                        profile_data.get("weight_kg"), profile_data.get("activity_level"),
+                        profile_data.get("diet_preference"), 
+                        profile_data.get("health_goals", []),
+                        profile_data.get("health_conditions", []))
                 
                 decision["stream_messages"].append({
                     "content": "✅ Your health profile has been updated!"
@@ -7,14 +7,20 @@ import json
 import hashlib
 import asyncpg
 from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from .db import Database
+from .templates import TemplateEngine, default_templates, detect_static_intent
+from .tracing import traced
+from .usage import metered
 
 class RegistrationAgent:
-    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db_url: str):
+    def __init__(self, channel: A2AChannel, ai_client, transcript: ChatTranscript, db: Database,
+                 templates: TemplateEngine = None):
         self.agent_id = "registration_agent"
         self.channel = channel
         self.ai_client = ai_client
         self.transcript = transcript
-        self.db_url = db_url
+        self.db = db
+        self.templates = templates or default_templates
         
         self.system_prompt = """You are the REGISTRATION SPECIALIST agent.
 
@@ -52,13 +58,11 @@ Be warm and helpful!"""
             "description": "Handles account creation",
             "capabilities": ["Account creation", "Input validation"]
         }
-        channel.register_agent(self.agent_id, self.card)
+        channel.register_agent(self.agent_id, self.card, self.process_with_streaming)
     
-    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
-        session = a2a_message.metadata.get("session", {})
+    def llm_request(self, a2a_message: A2AMessage) -> Dict:
         user_msg = a2a_message.metadata.get("original_user_message", "")
         chat_context = a2a_message.metadata.get("chat_context", "")
-        session_id = a2a_message.metadata.get("session_id")
         
         context = f"""
 MAIN AGENT REQUEST: {a2a_message.content}
@@ -68,17 +72,39 @@ CHAT HISTORY: {chat_context}
 Check chat history for email, phone, password, name. If all present, set status to "ready".
 """
         
-        response = await self.ai_client.chat.completions.create(
-            model="openai/gpt-3.5-turbo",
-            messages=[
+        return {
+            "model": "openai/gpt-3.5-turbo",
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": context}
             ],
-            temperature=0.7,
-            max_tokens=300
-        )
+            "temperature": 0.7,
+            "max_tokens": 300
+        }
+    
+    @traced
+    @metered
+    async def process_with_streaming(self, a2a_message: A2AMessage) -> Dict:
+        session = a2a_message.metadata.get("session", {})
+        user_msg = a2a_message.metadata.get("original_user_message", "")
+        chat_context = a2a_message.metadata.get("chat_context", "")
+        session_id = a2a_message.metadata.get("session_id")
+        
+        if detect_static_intent(user_msg) == "register":
+            decision = {
+                "stream_messages": self.templates.render(
+                    self.agent_id, "collecting", a2a_message.metadata.get("locale")
+                ),
+                "status": "collecting"
+            }
+            for msg in decision["stream_messages"]:
+                self.transcript.add_message(session_id, "assistant", msg["content"], "main_agent")
+            return decision
+        
+        response = await self.ai_client.chat.completions.create(**self.llm_request(a2a_message))
         
         result = response.choices[0].message.content
+        self.templates.record(self.agent_id, "llm")
         
         try:
             decision = json.loads(result)
@@ -92,17 +118,15 @@ Check chat history for email, phone, password, name. If all present, set status
             user_data = decision["create_user"]
             
             try:
-                conn = await asyncpg.connect(self.db_url)
                 password_hash = hashlib.sha256(user_data["password"].encode()).hexdigest()
                 
-                user_id = await conn.fetchval('''
-                    INSERT INTO users (email, phone, password_hash, name)
-                    VALUES ($1, $2, $3, $4)
-                    RETURNING user_id
-                ''', user_data.get("email"), user_data.get("phone"), 
-                    password_hash, user_data.get("name"))
-                
-                await conn.close()
+                async with self.db.acquire() as conn:
+                    user_id = await conn.fetchval('''
+                        INSERT INTO users (email, phone, password_hash, name)
+                        VALUES ($1, $2, $3, $4)
+                        RETURNING user_id
+                    ''', user_data.get("email"), user_data.get("phone"), 
+                        password_hash, user_data.get("name"))
                 
                 decision["stream_messages"].append({
                     "content": f"✅ Account created successfully! You can now login with your email."
@@ -0,0 +1,39 @@
+"""
+Serializer - JSON encoding to bytes for SSE events, WebSocket frames and prompts
+Uses orjson when it is installed and the stdlib json module otherwise;
+JSON_SERIALIZER=json forces the stdlib path
+"""
+
+from typing import Any
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class StdlibSerializer:
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+    def loads(self, data) -> Any:
+        return json.loads(data)
+
+class OrjsonSerializer:
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str)
+
+    def loads(self, data) -> Any:
+        return orjson.loads(data)
+
+def get_serializer(name: str = None):
+    if name == "json" or orjson is None:
+        return StdlibSerializer()
+    return OrjsonSerializer()
+
+serializer = get_serializer(os.getenv("JSON_SERIALIZER"))
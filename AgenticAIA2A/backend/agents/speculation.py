@@ -0,0 +1,187 @@
+"""
+Speculative Execution - Starts the likely specialist's LLM call alongside routing
+Only the model call is speculative; database and transcript writes still
+happen in the specialist after the Main Agent confirms the route. Routing
+calls made against a stale session and specialist calls that were not
+claimed both count as waste
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import contextvars
+import time
+from .a2a_protocol import A2AChannel, A2AMessage
+from .llm_gateway import LLMGateway, request_key
+from .usage import current_caller, message_caller
+
+CONTINUING_STATUSES = {"collecting", "answered"}
+
+class Speculation:
+    def __init__(self, agent_id: str, request: Dict, task: asyncio.Task):
+        self.agent_id = agent_id
+        self.request = request
+        self.key = request_key(request)
+        self.task = task
+        self.started = time.perf_counter()
+        self.finished = None
+        self.claimed = None
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task):
+        self.finished = time.perf_counter()
+
+    async def claim(self):
+        self.claimed = time.perf_counter()
+        return await self.task
+
+    def saved(self) -> float:
+        end = min(self.finished or self.claimed, self.claimed)
+        return end - self.started
+
+class Speculator:
+    def __init__(self, llm: LLMGateway, channel: A2AChannel, agent_ids: List[str],
+                 max_sessions: int = 10000, min_accuracy: float = 0.5, warmup: int = 10):
+        self.llm = llm
+        self.channel = channel
+        self.agent_ids = set(agent_ids)
+        self.max_sessions = max_sessions
+        self.min_accuracy = min_accuracy
+        self.warmup = warmup
+        self.routes: OrderedDict = OrderedDict()
+        self.sessions: OrderedDict = OrderedDict()
+        self.pending: Dict[str, Speculation] = {}
+        self.accuracy: Dict[str, Dict[str, int]] = {}
+        self.session_hits = 0
+        self.session_misses = 0
+        self.started = 0
+        self.wasted_calls = 0
+        self.wasted_tokens = 0
+        self.latency_saved = 0.0
+        self.routing_started = 0
+        self.routing_wasted_calls = 0
+        self.routing_wasted_tokens = 0
+
+    def _remember(self, cache: OrderedDict, key: str, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.max_sessions:
+            cache.popitem(last=False)
+
+    def known_session(self, session_id: str) -> Tuple[bool, Optional[Dict]]:
+        if session_id in self.sessions:
+            return True, self.sessions[session_id]
+        return False, None
+
+    def remember_session(self, session_id: str, session_data: Optional[Dict]):
+        self._remember(self.sessions, session_id, session_data)
+
+    def check_session(self, predicted: Optional[Dict], session_data: Optional[Dict]) -> bool:
+        if predicted == session_data:
+            self.session_hits += 1
+            return True
+        self.session_misses += 1
+        return False
+
+    def predict(self, session_id: Optional[str]) -> Optional[str]:
+        agent_id, status = self.routes.get(session_id, (None, None))
+        if agent_id not in self.agent_ids or status not in CONTINUING_STATUSES:
+            return None
+
+        counts = self.accuracy.get(agent_id, {"confirmed": 0, "mispredicted": 0})
+        total = counts["confirmed"] + counts["mispredicted"]
+        if total >= self.warmup and counts["confirmed"] / total < self.min_accuracy:
+            return None
+        return agent_id
+
+    def start(self, correlation_id: str, a2a_message: A2AMessage):
+        request = self.channel.get_agent(a2a_message.receiver).llm_request(a2a_message)
+        # Run outside the Main Agent's trace stage (the specialist records the claim),
+        # billed to the predicted specialist whether or not it is claimed
+        context = contextvars.Context()
+        context.run(current_caller.set, message_caller(a2a_message.receiver, a2a_message))
+        task = asyncio.get_running_loop().create_task(self.llm.create(**request), context=context)
+        self.pending[correlation_id] = Speculation(a2a_message.receiver, request, task)
+        self.started += 1
+
+    def settle(self, correlation_id: str, a2a_message: A2AMessage):
+        speculation = self.pending.get(correlation_id)
+        if speculation is None:
+            return
+
+        counts = self.accuracy.setdefault(speculation.agent_id, {"confirmed": 0, "mispredicted": 0})
+        if (a2a_message.receiver == speculation.agent_id
+                and self.channel.get_agent(a2a_message.receiver).llm_request(a2a_message) == speculation.request):
+            counts["confirmed"] += 1
+            self.llm.prefetched[speculation.key] = speculation
+        else:
+            counts["mispredicted"] += 1
+            self.discard(correlation_id)
+
+    def discard(self, correlation_id: str):
+        speculation = self.pending.pop(correlation_id, None)
+        if speculation is None:
+            return
+
+        if self.llm.prefetched.get(speculation.key) is speculation:
+            del self.llm.prefetched[speculation.key]
+
+        if speculation.claimed is not None:
+            self.latency_saved += speculation.saved()
+            return
+
+        self.wasted_calls += 1
+        self.wasted_tokens += self._abandon(speculation.task)
+
+    def start_routing(self, call) -> asyncio.Future:
+        """Run the Main Agent's routing call against the last-known session."""
+        self.routing_started += 1
+        return asyncio.ensure_future(call)
+
+    def discard_routing(self, routing: asyncio.Future):
+        self.routing_wasted_calls += 1
+        self.routing_wasted_tokens += self._abandon(routing)
+
+    def _abandon(self, task: asyncio.Future) -> int:
+        """Cancel a discarded call; return the tokens it used if it already finished."""
+        if not task.done():
+            task.cancel()
+            return 0
+        if task.cancelled() or task.exception() is not None:
+            return 0
+        usage = getattr(task.result(), "usage", None)
+        return getattr(usage, "total_tokens", 0) or 0
+
+    def observe(self, session_id: Optional[str], correlation_id: str,
+                agent_id: Optional[str], status: Optional[str]):
+        self.discard(correlation_id)
+        if not session_id:
+            return
+        if agent_id:
+            self._remember(self.routes, session_id, (agent_id, status))
+        else:
+            self.routes.pop(session_id, None)
+
+    def get_metrics(self) -> Dict:
+        started = self.started + self.routing_started
+        wasted = self.wasted_calls + self.routing_wasted_calls
+        return {
+            "session": {"hits": self.session_hits, "misses": self.session_misses},
+            "routing": {
+                "started": self.routing_started,
+                "wasted_calls": self.routing_wasted_calls,
+                "wasted_tokens": self.routing_wasted_tokens,
+                "waste_rate": round(self.routing_wasted_calls / self.routing_started, 3) if self.routing_started else 0.0
+            },
+            "specialist": {
+                "started": self.started,
+                "by_agent": {agent_id: dict(counts) for agent_id, counts in self.accuracy.items()},
+                "wasted_calls": self.wasted_calls,
+                "wasted_tokens": self.wasted_tokens,
+                "waste_rate": round(self.wasted_calls / self.started, 3) if self.started else 0.0,
+                "latency_saved_ms": round(self.latency_saved * 1000, 1)
+            },
+            "wasted_calls": wasted,
+            "wasted_tokens": self.wasted_tokens + self.routing_wasted_tokens,
+            "waste_rate": round(wasted / started, 3) if started else 0.0
+        }
@@ -0,0 +1,86 @@
+"""
+Conversation Summarizer - Folds older turns into a rolling per-session summary
+Runs as a background task after each turn so prompts stay a constant size
+"""
+
+from typing import Dict, List, Optional, Set
+import asyncio
+from .a2a_protocol import ChatTranscript, is_filler
+from .usage import Caller, current_caller
+
+class ConversationSummarizer:
+    def __init__(self, ai_client, transcript: ChatTranscript, max_summary_chars: int = 800):
+        self.ai_client = ai_client
+        self.transcript = transcript
+        self.max_summary_chars = max_summary_chars
+        self.running: Dict[str, asyncio.Task] = {}
+        self.dirty: Set[str] = set()
+
+        self.system_prompt = """You maintain a running summary of a health chatbot conversation.
+
+RULES:
+- Merge the new turns into the existing summary
+- Keep facts the user shared (name, email, phone, age, goals, conditions, diet)
+- Keep what the user is currently trying to do (register, login, profile, question)
+- Never include passwords
+- Drop greetings and progress updates
+- Reply with the summary text only, under 120 words"""
+
+    def schedule(self, session_id: str):
+        key = session_id or "guest"
+        if key in self.running:
+            self.dirty.add(key)
+            return
+
+        task = asyncio.create_task(self._run(session_id))
+        self.running[key] = task
+        task.add_done_callback(lambda _: self.running.pop(key, None))
+
+    async def _run(self, session_id: str):
+        key = session_id or "guest"
+        current_caller.set(Caller("summarizer", session_id))
+        while True:
+            self.dirty.discard(key)
+            try:
+                await self.summarize(session_id)
+            except Exception as e:
+                print(f"❌ Summarizer error: {e}")
+            if key not in self.dirty:
+                return
+
+    async def summarize(self, session_id: str):
+        folded = self.transcript.get_foldable(session_id)
+        if not folded:
+            return
+
+        current = self.transcript.get_summary(session_id)
+        turns = [msg for msg in folded if not is_filler(msg)]
+        if not turns:
+            self.transcript.fold(session_id, folded, current)
+            return
+
+        summary = await self._merge(current, turns)
+        if summary is None:
+            return
+        self.transcript.fold(session_id, folded, summary[-self.max_summary_chars:])
+
+    async def _merge(self, current: str, turns: List[Dict]) -> Optional[str]:
+        lines = "\n".join(
+            f"{'USER' if msg['role'] == 'user' else 'AI'}: {msg['message']}" for msg in turns
+        )
+
+        try:
+            response = await self.ai_client.chat.completions.create(
+                model="openai/gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": f"CURRENT SUMMARY: {current or 'None'}\n\nNEW TURNS:\n{lines}"}
+                ],
+                temperature=0.3,
+                max_tokens=200
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            # Leave the turns unfolded; raw turns may hold credentials and the summary is persisted
+            print(f"❌ Summarizer LLM error: {e}")
+            return None
@@ -0,0 +1,138 @@
+"""
+Response Templates - Canned stream messages for deterministic agent states
+Serves fixed-content replies without a model call and tracks how often
+each agent answers from a template versus the LLM
+"""
+
+from typing import Dict, List, Optional
+import random
+import re
+
+TEMPLATES = {
+    "en": {
+        "main_agent": {
+            "route_login": [["Let me log you in! 🔐"], ["Sure, let's get you signed in! 🔐"]],
+            "route_registration": [["Great! Let's create your account 🎉"], ["Awesome, let's get you set up! 🎉"]],
+            "route_logout": [["Sure, logging you out..."], ["No problem, signing you out..."]],
+            "auth_required": [
+                ["I'd love to help with that! 💪", "You'll need to log in first. Just say \"login\", or \"register\" if you're new."],
+                ["Happy to help! 💪", "Please log in first so I can personalize this for you. Say \"login\" or \"register\" to start."]
+            ],
+            "budget_exceeded": [
+                ["You've reached today's chat limit. ⏳", "I'll be ready to help again tomorrow. You can still log in, register or log out."]
+            ]
+        },
+        "login_agent": {
+            "collecting": [
+                ["What's the email or phone number on your account?", "Please share your password too. You can send both in one message."],
+                ["Please send me your email (or phone) and password to continue."]
+            ]
+        },
+        "registration_agent": {
+            "collecting": [
+                ["I'll need your email, phone number, a password and your name.", "You can send them one at a time or all together."],
+                ["Let's start with your name and email address.", "I'll also need a phone number and a password."]
+            ]
+        },
+        "health_agent": {
+            "auth_required": [["You need to be logged in to get personalized health advice."]]
+        },
+        "profile_agent": {
+            "auth_required": [["You need to be logged in to manage your profile."]]
+        },
+        "logout_agent": {
+            "logged_out": [
+                ["Logging you out...", "✅ You've been logged out successfully. Take care!"],
+                ["Signing you out...", "✅ All done, you're logged out. See you soon!"]
+            ]
+        }
+    },
+    "hi": {
+        "main_agent": {
+            "route_login": [["चलिए आपको लॉग इन करते हैं! 🔐"]],
+            "route_registration": [["बढ़िया! चलिए आपका अकाउंट बनाते हैं 🎉"]],
+            "route_logout": [["आपको लॉग आउट किया जा रहा है..."]],
+            "auth_required": [["इसमें मदद करना मुझे अच्छा लगेगा! 💪", "पहले लॉग इन करें। \"login\" लिखें, या नए हैं तो \"register\"।"]],
+            "budget_exceeded": [["आज की चैट सीमा पूरी हो गई है। ⏳", "कल मैं फिर से मदद के लिए तैयार रहूँगा। लॉग इन, रजिस्टर या लॉग आउट अभी भी कर सकते हैं।"]]
+        },
+        "login_agent": {
+            "collecting": [["अपने अकाउंट का ईमेल या फ़ोन नंबर बताइए।", "साथ में पासवर्ड भी भेजें।"]]
+        },
+        "registration_agent": {
+            "collecting": [["मुझे आपका ईमेल, फ़ोन नंबर, पासवर्ड और नाम चाहिए।", "आप इन्हें एक-एक करके या एक साथ भेज सकते हैं।"]]
+        },
+        "health_agent": {
+            "auth_required": [["व्यक्तिगत स्वास्थ्य सलाह के लिए लॉग इन करना ज़रूरी है।"]]
+        },
+        "profile_agent": {
+            "auth_required": [["प्रोफ़ाइल प्रबंधित करने के लिए लॉग इन करना ज़रूरी है।"]]
+        },
+        "logout_agent": {
+            "logged_out": [["लॉग आउट किया जा रहा है...", "✅ आप सफलतापूर्वक लॉग आउट हो गए। ध्यान रखें!"]]
+        }
+    }
+}
+
+STATIC_INTENTS = {
+    "login": re.compile(r"^(hi|hey|hello)?[\s,!]*(i want to |i'd like to |can i |please |let me )?(log ?in|sign ?in)( please)?[\s.!]*$"),
+    "register": re.compile(r"^(hi|hey|hello)?[\s,!]*(i want to |i'd like to |can i |please |let me )?(register|sign ?up|create (an |my )?account)( please)?[\s.!]*$"),
+    "logout": re.compile(r"^(please )?(log ?out|sign ?out)( please)?[\s.!]*$")
+}
+PROTECTED_INTENTS = {
+    "profile": re.compile(r"\b(my profile|health profile|update my (age|weight|height)|set up (my )?profile)\b"),
+    "health": re.compile(r"\b(protein|diet|nutrition|exercise|workout|calories|sleep|hydration|vitamin|fitness|weight loss|meal)\b")
+}
+CREDENTIAL_PATTERN = re.compile(r"@|\d{6,}|password")
+
+def detect_static_intent(message: str) -> Optional[str]:
+    text = message.lower().strip()
+    if CREDENTIAL_PATTERN.search(text):
+        return None
+    for intent, pattern in STATIC_INTENTS.items():
+        if pattern.match(text):
+            return intent
+    for intent, pattern in PROTECTED_INTENTS.items():
+        if pattern.search(text):
+            return intent
+    return None
+
+class TemplateEngine:
+    def __init__(self, templates: Dict = None, default_locale: str = "en"):
+        self.templates = templates or TEMPLATES
+        self.default_locale = default_locale
+        self.served: Dict[str, Dict[str, int]] = {}
+
+    def render(self, agent_id: str, status: str, locale: str = None, **values) -> Optional[List[Dict]]:
+        variants = (
+            self.templates.get(locale or self.default_locale, {}).get(agent_id, {}).get(status)
+            or self.templates[self.default_locale].get(agent_id, {}).get(status)
+        )
+        if not variants:
+            return None
+
+        self.record(agent_id, "template")
+        return [{"content": text.format(**values)} for text in random.choice(variants)]
+
+    def record(self, agent_id: str, source: str):
+        counts = self.served.setdefault(agent_id, {"template": 0, "llm": 0})
+        counts[source] += 1
+
+    def drain(self) -> Dict[str, Dict[str, int]]:
+        served, self.served = self.served, {}
+        return served
+
+    def merge(self, served: Dict[str, Dict[str, int]]):
+        for agent_id, counts in served.items():
+            for source, count in counts.items():
+                self.served.setdefault(agent_id, {"template": 0, "llm": 0})[source] += count
+
+    def get_metrics(self) -> Dict:
+        return {
+            agent_id: {
+                **counts,
+                "template_ratio": round(counts["template"] / (counts["template"] + counts["llm"]), 3)
+            }
+            for agent_id, counts in self.served.items()
+        }
+
+default_templates = TemplateEngine()
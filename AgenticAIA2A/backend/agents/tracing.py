@@ -0,0 +1,190 @@
+"""
+Tracing - Records each agent stage with its model and database calls
+One JSON line per finished stage, appended to TRACE_FILE (gzip when it ends
+in .gz), so recorded conversations can be replayed offline
+(benchmarks/replay.py). Stages of one turn share the turn's correlation_id.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import functools
+import gzip
+import inspect
+import os
+import time
+from .a2a_protocol import now_ns
+from .serializer import serializer
+
+class Stage:
+    def __init__(self, trace_id: str, agent_id: str):
+        self.trace_id = trace_id
+        self.agent_id = agent_id
+        self.ts = now_ns()
+        self.started = time.perf_counter()
+        self.llm: List[Dict] = []
+        self.db: List[Dict] = []
+
+    def finish(self, inputs: Dict, output: Any, error: str = None) -> Dict:
+        return {
+            "trace": self.trace_id,
+            "agent": self.agent_id,
+            "ts": self.ts,
+            "duration_ms": elapsed_ms(self.started),
+            "inputs": inputs,
+            "output": output,
+            "error": error,
+            "llm": self.llm,
+            "db": self.db
+        }
+
+current_stage: ContextVar[Optional[Stage]] = ContextVar("current_stage", default=None)
+
+class TraceRecorder:
+    def __init__(self, path: str = None, sink: Callable[[Dict], None] = None, flush_every: int = 20):
+        self.path = path
+        self.sink = sink
+        self.flush_every = flush_every
+        self.file = None
+        self.written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.sink)
+
+    def write(self, record: Dict):
+        self.written += 1
+        if self.sink:
+            self.sink(record)
+            return
+
+        if self.file is None:
+            opener = gzip.open if self.path.endswith(".gz") else open
+            self.file = opener(self.path, "ab")
+        self.file.write(serializer.dumps(record) + b"\n")
+        if self.written % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def get_metrics(self) -> Dict:
+        return {"enabled": self.enabled, "path": self.path, "stages": self.written}
+
+recorder = TraceRecorder(os.getenv("TRACE_FILE"))
+
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, asyncio.Future):
+        if value.done() and not value.cancelled() and value.exception() is None:
+            return value.result()
+        return None
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return value
+
+def _trace_id(arguments: Dict) -> Optional[str]:
+    if arguments.get("correlation_id"):
+        return arguments["correlation_id"]
+    for value in arguments.values():
+        if getattr(value, "correlation_id", None):
+            return value.correlation_id
+    return None
+
+def traced(method):
+    """Record an agent's process_with_streaming call as one stage."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if not recorder.enabled:
+            return await method(self, *args, **kwargs)
+
+        arguments = signature.bind(self, *args, **kwargs).arguments
+        arguments.pop("self")
+        stage = Stage(_trace_id(arguments), self.agent_id)
+        token = current_stage.set(stage)
+        try:
+            output = await method(self, *args, **kwargs)
+        except Exception as e:
+            recorder.write(stage.finish({k: _jsonable(v) for k, v in arguments.items()}, None, repr(e)))
+            raise
+        finally:
+            current_stage.reset(token)
+
+        # Inputs are captured after the call so awaited session lookups are resolved
+        recorder.write(stage.finish({k: _jsonable(v) for k, v in arguments.items()}, output))
+        return output
+
+    return wrapper
+
+def record_llm(request: Dict, response: Any, started: float):
+    stage = current_stage.get()
+    if stage is None:
+        return
+
+    usage = getattr(response, "usage", None)
+    stage.llm.append({
+        "request": request,
+        "content": response.choices[0].message.content,
+        "usage": {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0
+        } if usage is not None else None,
+        "latency_ms": elapsed_ms(started)
+    })
+
+def _rows(result: Any) -> Any:
+    if isinstance(result, list):
+        return [dict(row) for row in result]
+    if result is not None and hasattr(result, "keys"):
+        return dict(result)
+    return result
+
+class TracedConnection:
+    """Connection proxy that records queries, results and latencies into a stage.
+    Query arguments are not recorded; results are, since replay returns them."""
+
+    def __init__(self, conn, stage: Stage):
+        self.conn = conn
+        self.stage = stage
+
+    async def _call(self, method: str, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        call = {"method": method, "query": " ".join(query.split())}
+        try:
+            result = await getattr(self.conn, method)(query, *args, **kwargs)
+        except Exception as e:
+            call.update(result=None, error=type(e).__name__, latency_ms=elapsed_ms(started))
+            self.stage.db.append(call)
+            raise
+        call.update(result=None if method == "executemany" else _rows(result), latency_ms=elapsed_ms(started))
+        self.stage.db.append(call)
+        return result
+
+    async def execute(self, query: str, *args, **kwargs):
+        return await self._call("execute", query, *args, **kwargs)
+
+    async def executemany(self, query: str, *args, **kwargs):
+        return await self._call("executemany", query, *args, **kwargs)
+
+    async def fetch(self, query: str, *args, **kwargs):
+        return await self._call("fetch", query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args, **kwargs):
+        return await self._call("fetchrow", query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args, **kwargs):
+        return await self._call("fetchval", query, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+def trace_connection(conn):
+    stage = current_stage.get()
+    return TracedConnection(conn, stage) if stage is not None else conn
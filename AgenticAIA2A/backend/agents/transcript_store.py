@@ -0,0 +1,147 @@
+"""
+Transcript Store - Append-only Postgres storage for chat transcripts
+Buffers new messages in memory and writes them in batches; messages that may
+hold credentials are stored redacted, and rows past the retention period or
+whose session is gone are pruned
+"""
+
+from typing import Dict, List
+import asyncio
+import time
+from .a2a_protocol import parse_timestamp, to_datetime
+from .db import Database
+
+REDACTED = "[redacted: may contain credentials]"
+
+class TranscriptStore:
+    def __init__(self, db: Database, batch_size: int = 50, flush_interval: float = 1.0,
+                 retention_days: int = 30, prune_interval: float = 3600):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self.last_pruned = time.monotonic()
+        self.pending: List[tuple] = []
+        self.pending_summaries: Dict[str, str] = {}
+        self.flush_lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+
+    async def ensure_schema(self, conn):
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                message_id BIGSERIAL PRIMARY KEY,
+                session_id VARCHAR(255) NOT NULL,
+                role VARCHAR(20) NOT NULL,
+                agent VARCHAR(50),
+                message TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_chat_messages_session
+            ON chat_messages (session_id, message_id)
+        ''')
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS chat_summaries (
+                session_id VARCHAR(255) PRIMARY KEY,
+                summary TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    def append(self, session_id: str, entry: Dict):
+        self.pending.append((
+            session_id,
+            entry["role"],
+            entry.get("agent"),
+            REDACTED if entry.get("sensitive") else entry["message"],
+            to_datetime(entry["timestamp"])
+        ))
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    def save_summary(self, session_id: str, summary: str):
+        self.pending_summaries[session_id] = summary
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.pending and not self.pending_summaries:
+                return
+
+            batch, self.pending = self.pending, []
+            summaries, self.pending_summaries = self.pending_summaries, {}
+            try:
+                async with self.db.acquire() as conn:
+                    if batch:
+                        await conn.executemany('''
+                            INSERT INTO chat_messages (session_id, role, agent, message, created_at)
+                            VALUES ($1, $2, $3, $4, $5)
+                        ''', batch)
+                    if summaries:
+                        await conn.executemany('''
+                            INSERT INTO chat_summaries (session_id, summary)
+                            VALUES ($1, $2)
+                            ON CONFLICT (session_id) DO UPDATE SET
+                                summary = EXCLUDED.summary,
+                                updated_at = CURRENT_TIMESTAMP
+                        ''', list(summaries.items()))
+            except Exception as e:
+                self.pending = batch + self.pending
+                self.pending_summaries = {**summaries, **self.pending_summaries}
+                print(f"❌ Transcript flush error: {e}")
+
+    async def load_recent(self, session_id: str, limit: int) -> List[Dict]:
+        await self.flush()
+
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT role, agent, message, created_at FROM chat_messages
+                WHERE session_id = $1
+                ORDER BY message_id DESC
+                LIMIT $2
+            ''', session_id, limit)
+
+        return [{
+            "timestamp": parse_timestamp(row["created_at"]),
+            "role": row["role"],
+            "message": row["message"],
+            "agent": row["agent"]
+        } for row in reversed(rows)]
+
+    async def load_summary(self, session_id: str) -> str:
+        if session_id in self.pending_summaries:
+            return self.pending_summaries[session_id]
+
+        async with self.db.acquire() as conn:
+            summary = await conn.fetchval(
+                'SELECT summary FROM chat_summaries WHERE session_id = $1', session_id
+            )
+        return summary or ""
+
+    async def prune(self):
+        try:
+            async with self.db.acquire() as conn:
+                for table, column in (("chat_messages", "created_at"), ("chat_summaries", "updated_at")):
+                    await conn.execute(f'''
+                        DELETE FROM {table} t
+                        WHERE t.{column} < NOW() - make_interval(days => $1)
+                           OR NOT EXISTS (
+                               SELECT 1 FROM sessions s
+                               WHERE s.session_id = t.session_id AND s.expires_at > NOW()
+                           )
+                    ''', self.retention_days)
+        except Exception as e:
+            print(f"❌ Transcript prune error: {e}")
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+            if time.monotonic() - self.last_pruned >= self.prune_interval:
+                self.last_pruned = time.monotonic()
+                await self.prune()
@@ -0,0 +1,335 @@
+"""
+Usage Tracker - Token and cost accounting per agent, session and user
+Counts response.usage from every model call in memory, writes batched
+daily totals to Postgres, and applies per-user daily token budgets:
+past the budget calls use a cheaper model, past the limit the Main Agent
+answers from templates
+"""
+
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import asyncio
+import functools
+import inspect
+from .db import Database
+
+# USD per million prompt / completion tokens (OpenRouter list prices)
+MODEL_PRICES = {
+    "openai/gpt-3.5-turbo": (0.5, 1.5),
+    "openai/gpt-4o-mini": (0.15, 0.6)
+}
+
+class Caller(NamedTuple):
+    agent_id: str
+    session_id: Optional[str] = None
+    user_id: Optional[int] = None
+
+current_caller: ContextVar[Optional[Caller]] = ContextVar("current_caller", default=None)
+
+def message_caller(agent_id: str, a2a_message) -> Caller:
+    session = a2a_message.metadata.get("session") or {}
+    return Caller(agent_id, a2a_message.metadata.get("session_id"), session.get("user_id"))
+
+def metered(method):
+    """Attribute model calls made inside an agent call to the agent, its session and user."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs).arguments
+        if "a2a_message" in arguments:
+            caller = message_caller(self.agent_id, arguments["a2a_message"])
+        else:
+            session = arguments.get("session_data") or {}
+            caller = Caller(self.agent_id, arguments.get("session_id"), session.get("user_id"))
+
+        token = current_caller.set(caller)
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            current_caller.reset(token)
+
+    return wrapper
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+def _totals() -> Dict:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+
+def _add(totals: Dict, calls: int, prompt_tokens: int, completion_tokens: int, cost: float):
+    totals["calls"] += calls
+    totals["prompt_tokens"] += prompt_tokens
+    totals["completion_tokens"] += completion_tokens
+    totals["total_tokens"] += prompt_tokens + completion_tokens
+    totals["cost_usd"] += cost
+
+class UsageTracker:
+    def __init__(self, db: Database = None, daily_budget: int = 0, daily_limit: int = 0,
+                 fallback_model: str = "openai/gpt-4o-mini", batch_size: int = 200,
+                 flush_interval: float = 10.0, max_sessions: int = 10000):
+        self.db = db
+        self.daily_budget = daily_budget
+        self.daily_limit = daily_limit
+        self.fallback_model = fallback_model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_sessions = max_sessions
+        self.totals = _totals()
+        self.by_agent: Dict[str, Dict] = {}
+        self.by_user: Dict[int, Dict] = {}
+        self.by_session: OrderedDict = OrderedDict()
+        self.session_users: OrderedDict = OrderedDict()
+        self.day = datetime.utcnow().date()
+        self.daily: Dict[str, int] = {}
+        self.loaded: Set[str] = set()
+        self.pending: Dict[Tuple, Dict] = {}
+        self.downgraded = 0
+        self.template_only = 0
+        self.missing_usage = 0
+        self.flush_lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+
+    async def ensure_schema(self, conn):
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_usage (
+                day DATE NOT NULL,
+                agent_id VARCHAR(50) NOT NULL,
+                session_id VARCHAR(255) NOT NULL,
+                model VARCHAR(100) NOT NULL,
+                user_id INTEGER,
+                calls INTEGER NOT NULL,
+                prompt_tokens BIGINT NOT NULL,
+                completion_tokens BIGINT NOT NULL,
+                cost_usd DOUBLE PRECISION NOT NULL,
+                PRIMARY KEY (day, agent_id, session_id, model)
+            )
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_llm_usage_user_day
+            ON llm_usage (user_id, day)
+        ''')
+
+    def _roll(self):
+        today = datetime.utcnow().date()
+        if today != self.day:
+            self.day = today
+            self.daily.clear()
+            self.loaded.clear()
+
+    def _remember(self, cache: OrderedDict, key: str, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.max_sessions:
+            cache.popitem(last=False)
+
+    def resolve(self, caller: Caller) -> Tuple[Optional[int], Optional[str]]:
+        """Return the caller's user_id and budget identity (the user, or the session for guests)."""
+        user_id = caller.user_id
+        if user_id and caller.session_id:
+            self._remember(self.session_users, caller.session_id, user_id)
+        elif caller.session_id:
+            user_id = self.session_users.get(caller.session_id)
+
+        if user_id:
+            return user_id, f"user:{user_id}"
+        return None, caller.session_id
+
+    def end_session(self, session_id: str):
+        """Stop billing a logged-out session id to its former user."""
+        self.session_users.pop(session_id, None)
+
+    async def _load(self, identity: str, user_id: Optional[int]):
+        if identity in self.loaded:
+            return
+        self.loaded.add(identity)
+        if not user_id or self.db is None:
+            return
+
+        # Usage from earlier processes and restarts today; our own pending rows are flushed first
+        try:
+            await self.flush()
+            async with self.db.acquire() as conn:
+                used = await conn.fetchval('''
+                    SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0)
+                    FROM llm_usage WHERE user_id = $1 AND day = $2
+                ''', user_id, self.day)
+            self.daily[identity] = int(used)
+        except Exception as e:
+            print(f"❌ Usage load error: {e}")
+
+    async def tier(self, caller: Optional[Caller]) -> str:
+        """Budget tier: full, downgrade (past the daily budget) or templates (past the daily limit)."""
+        if caller is None or not (self.daily_budget or self.daily_limit):
+            return "full"
+
+        self._roll()
+        user_id, identity = self.resolve(caller)
+        if identity is None:
+            return "full"
+        await self._load(identity, user_id)
+
+        used = self.daily.get(identity, 0)
+        if self.daily_limit and used >= self.daily_limit:
+            return "templates"
+        if self.daily_budget and used >= self.daily_budget:
+            return "downgrade"
+        return "full"
+
+    async def apply_budget(self, caller: Optional[Caller], request: Dict) -> Dict:
+        if await self.tier(caller) == "full" or not self.fallback_model:
+            return request
+        if request.get("model") == self.fallback_model:
+            return request
+        self.downgraded += 1
+        return {**request, "model": self.fallback_model}
+
+    def record(self, caller: Optional[Caller], model: str, usage):
+        if usage is None:
+            self.missing_usage += 1
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self._account(caller or Caller("unattributed"), model, 1, prompt_tokens, completion_tokens,
+                      estimate_cost(model, prompt_tokens, completion_tokens))
+
+    def _account(self, caller: Caller, model: str, calls: int, prompt_tokens: int,
+                 completion_tokens: int, cost: float):
+        self._roll()
+        user_id, identity = self.resolve(caller)
+        counts = (calls, prompt_tokens, completion_tokens, cost)
+        _add(self.totals, *counts)
+        _add(self.by_agent.setdefault(caller.agent_id, _totals()), *counts)
+        if user_id:
+            _add(self.by_user.setdefault(user_id, _totals()), *counts)
+        if caller.session_id:
+            session = self.by_session.get(caller.session_id) or _totals()
+            _add(session, *counts)
+            self._remember(self.by_session, caller.session_id, session)
+        if identity:
+            self.daily[identity] = self.daily.get(identity, 0) + prompt_tokens + completion_tokens
+
+        key = (self.day, caller.agent_id, caller.session_id or "", model)
+        row = self.pending.setdefault(key, {**_totals(), "user_id": None})
+        row["user_id"] = row["user_id"] or user_id
+        _add(row, *counts)
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    def drain(self) -> List[Dict]:
+        """Hand usage recorded in a worker process back to the parent (see merge)."""
+        rows = [{"agent_id": agent_id, "session_id": session_id, "model": model, **row}
+                for (_, agent_id, session_id, model), row in self.pending.items()]
+        self.pending = {}
+        return rows
+
+    def merge(self, rows: List[Dict]):
+        for row in rows:
+            caller = Caller(row["agent_id"], row["session_id"] or None, row["user_id"])
+            self._account(caller, row["model"], row["calls"], row["prompt_tokens"],
+                          row["completion_tokens"], row["cost_usd"])
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.pending or self.db is None:
+                return
+
+            batch, self.pending = self.pending, {}
+            try:
+                async with self.db.acquire() as conn:
+                    await conn.executemany('''
+                        INSERT INTO llm_usage (day, agent_id, session_id, model, user_id,
+                                               calls, prompt_tokens, completion_tokens, cost_usd)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                        ON CONFLICT (day, agent_id, session_id, model) DO UPDATE SET
+                            user_id = COALESCE(EXCLUDED.user_id, llm_usage.user_id),
+                            calls = llm_usage.calls + EXCLUDED.calls,
+                            prompt_tokens = llm_usage.prompt_tokens + EXCLUDED.prompt_tokens,
+                            completion_tokens = llm_usage.completion_tokens + EXCLUDED.completion_tokens,
+                            cost_usd = llm_usage.cost_usd + EXCLUDED.cost_usd
+                    ''', [
+                        (day, agent_id, session_id, model, row["user_id"], row["calls"],
+                         row["prompt_tokens"], row["completion_tokens"], row["cost_usd"])
+                        for (day, agent_id, session_id, model), row in batch.items()
+                    ])
+            except Exception as e:
+                for key, row in batch.items():
+                    if key in self.pending:
+                        for field in ("calls", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd"):
+                            self.pending[key][field] += row[field]
+                    else:
+                        self.pending[key] = row
+                print(f"❌ Usage flush error: {e}")
+
+    async def history(self, days: int = 7) -> List[Dict]:
+        await self.flush()
+
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT day, agent_id, model, SUM(calls) AS calls,
+                       SUM(prompt_tokens) AS prompt_tokens,
+                       SUM(completion_tokens) AS completion_tokens,
+                       SUM(cost_usd) AS cost_usd
+                FROM llm_usage
+                WHERE day > CURRENT_DATE - $1::int
+                GROUP BY day, agent_id, model
+                ORDER BY day DESC, agent_id, model
+            ''', days)
+
+        return [{
+            "day": row["day"].isoformat(),
+            "agent_id": row["agent_id"],
+            "model": row["model"],
+            "calls": row["calls"],
+            "prompt_tokens": row["prompt_tokens"],
+            "completion_tokens": row["completion_tokens"],
+            "cost_usd": round(row["cost_usd"], 6)
+        } for row in rows]
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    def get_metrics(self) -> Dict:
+        return {
+            **{key: round(value, 6) if key == "cost_usd" else value for key, value in self.totals.items()},
+            "downgraded_calls": self.downgraded,
+            "template_only_turns": self.template_only,
+            "missing_usage": self.missing_usage,
+            "pending_rows": len(self.pending)
+        }
+
+    def get_stats(self, limit: int = 20) -> Dict:
+        def top(buckets: Dict) -> List[Dict]:
+            ranked = sorted(buckets.items(), key=lambda item: item[1]["total_tokens"], reverse=True)[:limit]
+            return [{"id": key, **totals, "cost_usd": round(totals["cost_usd"], 6)} for key, totals in ranked]
+
+        self._roll()
+        return {
+            "totals": self.get_metrics(),
+            "budgets": {
+                "daily_budget_tokens": self.daily_budget,
+                "daily_limit_tokens": self.daily_limit,
+                "fallback_model": self.fallback_model
+            },
+            "by_agent": {agent_id: {**totals, "cost_usd": round(totals["cost_usd"], 6)}
+                         for agent_id, totals in self.by_agent.items()},
+            "top_users": top(self.by_user),
+            "top_sessions": top(self.by_session),
+            "today": {
+                "day": self.day.isoformat(),
+                "over_budget": sum(1 for used in self.daily.values()
+                                   if self.daily_budget and used >= self.daily_budget),
+                "over_limit": sum(1 for used in self.daily.values()
+                                  if self.daily_limit and used >= self.daily_limit),
+                "top": sorted(({"id": identity, "tokens": used} for identity, used in self.daily.items()),
+                              key=lambda item: item["tokens"], reverse=True)[:limit]
+            }
+        }
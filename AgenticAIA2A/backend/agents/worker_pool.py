@@ -0,0 +1,220 @@
+"""
+Agent Worker Pool - Runs specialist agents in separate worker processes
+Messages cross a local pipe in A2A dict format (A2AMessage.to_dict)
+"""
+
+from multiprocessing import Pipe, Process
+from typing import Callable, Dict, List
+import asyncio
+import functools
+import itertools
+import os
+import threading
+from .a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from .db import Database
+from .llm_gateway import LLMGateway
+from .templates import default_templates
+from . import tracing
+from .usage import UsageTracker
+
+SPECIALIST_AGENTS = ["registration_agent", "login_agent", "profile_agent", "health_agent", "logout_agent"]
+
+def default_client_factory():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        base_url="https://openrouter.ai/api/v1"
+    )
+
+def _build_agents(db_url: str, client_factory: Callable):
+    from .registration_agent import RegistrationAgent
+    from .login_agent import LoginAgent
+    from .profile_agent import ProfileAgent
+    from .health_agent import HealthAgent
+    from .logout_agent import LogoutAgent
+
+    channel = A2AChannel()
+    usage = UsageTracker()
+    client = LLMGateway(client_factory(), usage=usage)
+    transcript = ChatTranscript()
+    db = Database(db_url, max_size=int(os.getenv("DB_POOL_SIZE", "10")))
+
+    agents = [
+        RegistrationAgent(channel, client, transcript, db),
+        LoginAgent(channel, client, transcript, db),
+        ProfileAgent(channel, client, transcript, db),
+        HealthAgent(channel, client, transcript),
+        LogoutAgent(channel, client, transcript, db)
+    ]
+    return {agent.agent_id: agent for agent in agents}, transcript, usage
+
+def _worker_main(conn, db_url: str, client_factory: Callable):
+    asyncio.run(_serve(conn, db_url, client_factory))
+
+async def _serve(conn, db_url: str, client_factory: Callable):
+    # Workers would interleave writes to the parent's trace file
+    tracing.recorder = tracing.TraceRecorder()
+    agents, transcript, usage = _build_agents(db_url, client_factory)
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    tasks = set()
+
+    def on_request(request):
+        if request is None:
+            stopped.set_result(None)
+            return
+        task = loop.create_task(_handle(conn, agents, transcript, usage, request))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    threading.Thread(target=_read_loop, args=(conn, loop, on_request), daemon=True).start()
+    await stopped
+
+async def _handle(conn, agents: Dict, transcript: ChatTranscript, usage: UsageTracker, request: Dict):
+    message = A2AMessage.from_dict(request["message"])
+    try:
+        response = await agents[message.receiver].process_with_streaming(message)
+        recorded = transcript.pop_transcript(message.metadata.get("session_id"))
+        reply = {
+            "id": request["id"],
+            "response": response,
+            "transcript": [(entry["role"], entry["message"], entry["agent"]) for entry in recorded],
+            "templates": default_templates.drain(),
+            "usage": usage.drain()
+        }
+    except Exception as e:
+        reply = {"id": request["id"], "error": f"{type(e).__name__}: {e}"}
+    conn.send(reply)
+
+def _read_loop(conn, loop, callback: Callable):
+    while True:
+        try:
+            data = conn.recv()
+        except (EOFError, OSError):
+            data = None
+        try:
+            loop.call_soon_threadsafe(callback, data)
+        except RuntimeError:
+            return
+        if data is None:
+            return
+
+class AgentWorkerError(Exception):
+    pass
+
+class AgentProcessPool:
+    def __init__(self, db_url: str, processes: int = None,
+                 client_factory: Callable = default_client_factory, timeout: float = 60):
+        self.db_url = db_url
+        self.processes = processes or os.cpu_count()
+        self.client_factory = client_factory
+        self.timeout = timeout
+        self.workers: List[Dict] = []
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.request_ids = itertools.count()
+        self.transcript = None
+        self.usage = None
+
+    def attach(self, channel: A2AChannel, transcript: ChatTranscript, agent_ids: List[str] = None,
+               usage: UsageTracker = None):
+        self.transcript = transcript
+        self.usage = usage
+        for agent_id in agent_ids or SPECIALIST_AGENTS:
+            channel.set_handler(agent_id, self.dispatch)
+
+    def start(self):
+        self.workers = [self._spawn() for _ in range(self.processes)]
+        print(f"✅ Agent worker pool started ({self.processes} processes)")
+
+    def _spawn(self) -> Dict:
+        parent_conn, child_conn = Pipe()
+        process = Process(
+            target=_worker_main,
+            args=(child_conn, self.db_url, self.client_factory),
+            daemon=True
+        )
+        process.start()
+        # Only the child may hold this end, so the parent sees EOF when the worker dies
+        child_conn.close()
+        worker = {"process": process, "conn": parent_conn, "in_flight": 0, "requests": set()}
+        threading.Thread(
+            target=_read_loop,
+            args=(parent_conn, asyncio.get_running_loop(), functools.partial(self._on_reply, worker)),
+            daemon=True
+        ).start()
+        return worker
+
+    def _on_exit(self, worker: Dict):
+        if worker not in self.workers:
+            return
+
+        error = AgentWorkerError(f"agent worker {worker['process'].pid} exited")
+        for request_id in worker["requests"]:
+            future = self.pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+        worker["requests"].clear()
+        worker["conn"].close()
+
+        self.workers[self.workers.index(worker)] = self._spawn()
+        print(f"⚠️ Agent worker {worker['process'].pid} exited, respawned")
+
+    def _on_reply(self, worker: Dict, reply: Dict):
+        if reply is None:
+            self._on_exit(worker)
+            return
+        worker["requests"].discard(reply["id"])
+        future = self.pending.pop(reply["id"], None)
+        if future is None or future.done():
+            return
+        if "error" in reply:
+            future.set_exception(AgentWorkerError(reply["error"]))
+        else:
+            future.set_result(reply)
+
+    async def dispatch(self, message: A2AMessage) -> Dict:
+        if not self.workers:
+            self.start()
+
+        worker = min(self.workers, key=lambda w: w["in_flight"])
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+
+        worker["in_flight"] += 1
+        worker["requests"].add(request_id)
+        try:
+            try:
+                worker["conn"].send({"id": request_id, "message": message.to_dict()})
+            except OSError as e:
+                self._on_exit(worker)
+                raise AgentWorkerError(f"agent worker unavailable: {e}") from e
+            result = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise AgentWorkerError(f"{message.receiver} did not reply within {self.timeout}s")
+        finally:
+            worker["in_flight"] -= 1
+            worker["requests"].discard(request_id)
+            self.pending.pop(request_id, None)
+
+        if self.transcript:
+            session_id = message.metadata.get("session_id")
+            for role, content, agent in result["transcript"]:
+                self.transcript.add_message(session_id, role, content, agent)
+
+        default_templates.merge(result.get("templates", {}))
+        if self.usage:
+            self.usage.merge(result.get("usage", []))
+        return result["response"]
+
+    def shutdown(self):
+        workers, self.workers = self.workers, []
+        for worker in workers:
+            try:
+                worker["conn"].send(None)
+            except OSError:
+                pass
+        for worker in workers:
+            worker["process"].join(timeout=5)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
@@ -0,0 +1,74 @@
+"""
+Benchmark - Inline vs process-pool specialist agents
+Run from backend/: python -m benchmarks.bench_agent_pool [turns] [concurrency] [processes]
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from types import SimpleNamespace
+from agents.a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from agents.health_agent import HealthAgent
+from agents.worker_pool import AgentProcessPool
+
+LLM_LATENCY = 0.05
+CPU_ITERATIONS = 20000
+
+class StubCompletions:
+    async def create(self, **kwargs):
+        await asyncio.sleep(LLM_LATENCY)
+        hashlib.pbkdf2_hmac("sha256", kwargs["messages"][-1]["content"].encode(), b"bench", CPU_ITERATIONS)
+        content = json.dumps({
+            "stream_messages": [{"content": "Try lentils, paneer and chickpeas."}],
+            "status": "answered"
+        })
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def stub_client_factory():
+    return SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions()))
+
+async def run(mode: str, turns: int, concurrency: int, processes: int = None) -> float:
+    channel = A2AChannel(max_queue_depth=turns, max_concurrency=concurrency)
+    transcript = ChatTranscript()
+    HealthAgent(channel, stub_client_factory(), transcript)
+
+    pool = None
+    if mode == "process":
+        pool = AgentProcessPool(None, processes=processes, client_factory=stub_client_factory)
+        pool.attach(channel, transcript, ["health_agent"])
+        pool.start()
+        await channel.request(make_message(-1))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(channel.request(make_message(i)) for i in range(turns)))
+    elapsed = time.perf_counter() - started
+
+    await channel.close()
+    if pool:
+        pool.shutdown()
+    return turns / elapsed
+
+def make_message(index: int) -> A2AMessage:
+    return A2AMessage(
+        sender="main_agent",
+        receiver="health_agent",
+        content="protein sources?",
+        metadata={
+            "session": {"user_id": 1},
+            "original_user_message": f"What are good protein sources? #{index}",
+            "chat_context": "No previous conversation.",
+            "session_id": f"bench-{index % 16}"
+        },
+        correlation_id=f"bench-{index}"
+    )
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    for mode in ["inline", "process"]:
+        throughput = asyncio.run(run(mode, turns, concurrency, processes))
+        print(f"{mode:>8}: {throughput:8.1f} turns/s ({turns} turns, concurrency {concurrency})")
@@ -0,0 +1,42 @@
+"""
+Benchmark - A2A message construction
+Compares building messages with the previous sender-millisecond IDs and
+ISO timestamps against the counter-based IDs and integer timestamps,
+and counts ID collisions in a tight loop.
+Run from backend/: python -m benchmarks.bench_messages [messages]
+"""
+
+import sys
+import time
+from datetime import datetime
+from agents.a2a_protocol import A2AMessage
+
+class LegacyMessage:
+    def __init__(self, sender: str, receiver: str, content: str, metadata: dict = None):
+        self.sender = sender
+        self.receiver = receiver
+        self.content = content
+        self.timestamp = datetime.utcnow().isoformat()
+        self.metadata = metadata or {}
+        self.message_id = f"{sender}-{int(datetime.utcnow().timestamp() * 1000)}"
+        self.correlation_id = self.message_id
+
+def measure(message_class, count: int):
+    started = time.perf_counter()
+    ids = [message_class("main_agent", "login_agent", "login", {}).message_id for _ in range(count)]
+    elapsed = time.perf_counter() - started
+    return elapsed / count * 1e9, count - len(set(ids))
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    print(f"messages: {count}")
+    for name, message_class in [("legacy", LegacyMessage), ("A2AMessage", A2AMessage)]:
+        cost, collisions = measure(message_class, count)
+        print(f"{name:>12}: {cost:8.0f} ns/message  {collisions:8d} duplicate ids")
+
+    message = A2AMessage("main_agent", "login_agent", "login")
+    started = time.perf_counter()
+    for _ in range(count):
+        message.to_dict()
+    print(f"{'to_dict':>12}: {(time.perf_counter() - started) / count * 1e9:8.0f} ns/message")
@@ -0,0 +1,59 @@
+"""
+Benchmark - SSE event encoding throughput
+Frames the events of many chat turns the way the server sends them and
+reports events per second on one core: the previous dict + stdlib json path
+through sse_starlette, and byte-level framing with each serializer.
+Run from backend/: python -m benchmarks.bench_serialization [turns]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from sse_starlette.sse import ServerSentEvent
+import streaming
+from agents.serializer import get_serializer, orjson
+from streaming import DONE, THINKING, Turn
+
+REPLY = "For protein, try lentils, chickpeas, paneer and curd. Aim for roughly 1g per kg of body weight daily 💪"
+
+def build_turn(index: int) -> Turn:
+    turn = Turn(f"{index:024x}")
+    turn.emit({"type": "user_message", "message": "How much protein do I need?"})
+    turn.emit_static(THINKING)
+    for _ in range(3):
+        turn.emit({"type": "agent_message", "message": REPLY, "agent": "main_agent"})
+    turn.emit({"type": "session_update", "session_id": "x" * 43})
+    turn.emit_static(DONE)
+    turn.finish()
+    return turn
+
+async def dict_events(turn: Turn):
+    async for seq, event in turn.follow():
+        yield {"id": f"{turn.turn_id}:{seq}", "data": json.dumps(event)}
+
+async def frame_dicts(turns):
+    for turn in turns:
+        async for item in dict_events(turn):
+            ServerSentEvent(**item).encode()
+
+async def frame_bytes(turns):
+    for turn in turns:
+        async for chunk in streaming.sse_events(turn):
+            pass
+
+def measure(framer, turns: int) -> float:
+    batch = [build_turn(i) for i in range(turns)]
+    events = sum(len(turn.events) for turn in batch)
+    started = time.perf_counter()
+    asyncio.run(framer(batch))
+    return events / (time.perf_counter() - started)
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print(f"turns: {turns}")
+    print(f"{'dict + json.dumps':>22}: {measure(frame_dicts, turns):12,.0f} events/s")
+    for name in ["json"] + (["orjson"] if orjson else []):
+        streaming.serializer = get_serializer(name)
+        print(f"{'bytes + ' + name:>22}: {measure(frame_bytes, turns):12,.0f} events/s")
@@ -0,0 +1,72 @@
+"""
+Benchmark - Cold start
+Measures import time of main, time from process launch to the first answered
+request, and time until /ready reports the background warmup finished.
+Startup writes the schema (and drops it with RESET_DATABASE), so the server
+gets BENCH_DATABASE_URL (default: an unreachable address) rather than DATABASE_URL.
+Run from backend/: python -m benchmarks.bench_startup [runs]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+PORT = 8766
+
+def server_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("OPENROUTER_API_KEY", "bench")
+    env["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", "postgresql://bench@127.0.0.1:1/bench")
+    return env
+
+def import_time() -> float:
+    code = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env=server_env(), check=True)
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+def get(path: str):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{PORT}{path}", timeout=1) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+    except OSError:
+        return None, None
+
+def cold_start():
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=server_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        first_response = None
+        while time.perf_counter() - started < 30:
+            status, body = get("/ready")
+            elapsed = (time.perf_counter() - started) * 1000
+            if status is not None and first_response is None:
+                first_response = elapsed
+            if body and body.get("status") in ("ready", "failed"):
+                return first_response, elapsed, body["status"]
+            time.sleep(0.005)
+        raise RuntimeError("server did not finish warming up")
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    imports = [import_time() for _ in range(runs)]
+    starts = [cold_start() for _ in range(runs)]
+
+    print(f"runs: {runs}")
+    print(f"import main:          {statistics.median(imports):8.1f} ms")
+    print(f"first response:       {statistics.median(s[0] for s in starts):8.1f} ms")
+    print(f"warmup finished:      {statistics.median(s[1] for s in starts):8.1f} ms ({starts[-1][2]})")
@@ -0,0 +1,147 @@
+"""
+Benchmark - WebSocket vs SSE transport
+Measures server memory per open connection and sequential turn latency
+against a local server with stubbed agents.
+Run from backend/: python -m benchmarks.bench_transports [connections] [turns]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from multiprocessing import Process
+
+PORT = 8765
+HOLD_SECONDS = 3.0
+
+def serve(hold: float):
+    os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+    os.environ["STREAM_DELAY_SCALE"] = "0"
+    os.environ["RATE_LIMIT_CHAT_BURST"] = "1000000"
+    os.environ["ADMISSION_MAX_GUEST_TURNS"] = "100000"
+    import uvicorn
+    import main
+
+    async def stub_main_agent(user_message, session_data, session_id=None, correlation_id=None,
+                              locale=None, session_lookup=None):
+        if user_message == "hold":
+            await asyncio.sleep(hold)
+        return {"stream_messages": [{"content": f"echo: {user_message}"}]}
+
+    main.main_agent.process_with_streaming = stub_main_agent
+    main.chat_transcript.store = None
+    main.summarizer.schedule = lambda session_id: None
+    main.app.router.on_startup.clear()
+    main.app.router.on_shutdown.clear()
+    uvicorn.run(main.app, host="127.0.0.1", port=PORT, log_level="warning")
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+async def wait_ready(client):
+    for _ in range(100):
+        try:
+            await client.get(f"http://127.0.0.1:{PORT}/health")
+            return
+        except Exception:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+async def idle_websockets(pid: int, count: int) -> float:
+    import websockets
+
+    baseline = rss_kb(pid)
+    sockets = []
+    for _ in range(count):
+        ws = await websockets.connect(f"ws://127.0.0.1:{PORT}/api/chat/ws")
+        await ws.recv()
+        sockets.append(ws)
+    await asyncio.sleep(0.5)
+    per_socket = (rss_kb(pid) - baseline) / count
+
+    for ws in sockets:
+        await ws.close()
+    return per_socket
+
+async def open_sse_streams(client, pid: int, count: int) -> float:
+    baseline = rss_kb(pid)
+    opened = asyncio.Event()
+    connected = 0
+
+    async def hold_stream(index: int):
+        nonlocal connected
+        async with client.stream("POST", f"http://127.0.0.1:{PORT}/api/chat/stream",
+                                 json={"message": "hold", "request_id": f"hold-{index}"}) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    connected += 1
+                    if connected == count:
+                        opened.set()
+                    break
+            await opened.wait()
+            await asyncio.sleep(0.5)
+
+    tasks = [asyncio.create_task(hold_stream(i)) for i in range(count)]
+    await opened.wait()
+    await asyncio.sleep(0.2)
+    per_stream = (rss_kb(pid) - baseline) / count
+    await asyncio.gather(*tasks)
+    return per_stream
+
+async def sse_turns(client, turns: int) -> float:
+    started = time.perf_counter()
+    for index in range(turns):
+        async with client.stream("POST", f"http://127.0.0.1:{PORT}/api/chat/stream",
+                                 json={"message": f"turn {index}"}) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data:") and json.loads(line[5:])["type"] == "done":
+                    break
+    return (time.perf_counter() - started) / turns * 1000
+
+async def websocket_turns(turns: int) -> float:
+    import websockets
+
+    async with websockets.connect(f"ws://127.0.0.1:{PORT}/api/chat/ws") as ws:
+        await ws.recv()
+        started = time.perf_counter()
+        for index in range(turns):
+            await ws.send(json.dumps({"message": f"turn {index}"}))
+            while json.loads(await ws.recv())["type"] != "done":
+                pass
+        return (time.perf_counter() - started) / turns * 1000
+
+async def measure(pid: int, transport: str, connections: int, turns: int):
+    import httpx
+
+    limits = httpx.Limits(max_connections=connections + 10)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        await wait_ready(client)
+        await sse_turns(client, 5)
+        await websocket_turns(5)
+
+        if transport == "websocket":
+            return await idle_websockets(pid, connections), await websocket_turns(turns)
+        return await open_sse_streams(client, pid, connections), await sse_turns(client, turns)
+
+def run(transport: str, connections: int, turns: int):
+    server = Process(target=serve, args=(HOLD_SECONDS,), daemon=True)
+    server.start()
+    try:
+        return asyncio.run(measure(server.pid, transport, connections, turns))
+    finally:
+        server.terminate()
+        server.join()
+
+if __name__ == "__main__":
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print(f"connections: {connections}, turns: {turns}")
+    for transport in ["websocket", "sse"]:
+        memory, latency = run(transport, connections, turns)
+        print(f"{transport:>10}: {memory:7.1f} KB per open connection  {latency:7.2f} ms/turn")
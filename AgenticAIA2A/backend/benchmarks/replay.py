@@ -0,0 +1,229 @@
+"""
+Benchmark - Offline replay of recorded conversations
+Reruns turns recorded with TRACE_FILE against the current agents. A stub LLM
+and a stub database return the recorded outputs after the recorded latencies
+(scaled by --latency-scale; 0 skips the waits), so only the code differs
+between runs. Reports per-stage timings; --save writes them as JSON and
+--compare diffs them against a report saved on another commit.
+Run from backend/: python -m benchmarks.replay <trace file> [--save report.json] [--compare report.json]
+"""
+
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Dict, List
+import argparse
+import asyncio
+import gzip
+import json
+import statistics
+import asyncpg
+from agents import tracing
+from agents.a2a_protocol import A2AChannel, ChatTranscript
+from agents.llm_gateway import LLMGateway
+from agents.main_agent import MainAgent
+from agents.registration_agent import RegistrationAgent
+from agents.login_agent import LoginAgent
+from agents.profile_agent import ProfileAgent
+from agents.health_agent import HealthAgent
+from agents.logout_agent import LogoutAgent
+
+class ReplayMismatch(Exception):
+    def __init__(self, kind: str, trace_id: str, agent_id: str):
+        self.kind = kind
+        self.trace_id = trace_id
+        self.agent_id = agent_id
+        super().__init__(f"no recorded {kind} call left for {agent_id} in {trace_id}")
+
+def load_stages(path: str) -> List[Dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class Recorded:
+    def __init__(self, stages: List[Dict], latency_scale: float):
+        self.calls = {
+            (stage["trace"], stage["agent"]): {"llm": deque(stage["llm"]), "db": deque(stage["db"])}
+            for stage in stages
+        }
+        self.latency_scale = latency_scale
+        self.mismatches: Dict[str, int] = defaultdict(int)
+
+    async def next(self, kind: str, method: str = None) -> Dict:
+        stage = tracing.current_stage.get()
+        trace_id, agent_id = (stage.trace_id, stage.agent_id) if stage else (None, None)
+        calls = self.calls.get((trace_id, agent_id), {}).get(kind)
+        if not calls or (method and calls[0]["method"] != method):
+            self.mismatches[agent_id] += 1
+            raise ReplayMismatch(kind, trace_id, agent_id)
+
+        call = calls.popleft()
+        if self.latency_scale:
+            await asyncio.sleep(call["latency_ms"] / 1000 * self.latency_scale)
+        return call
+
+    def unused(self) -> Dict[str, int]:
+        counts: Dict[str, int] = defaultdict(int)
+        for (_, agent_id), calls in self.calls.items():
+            counts[agent_id] += len(calls["llm"]) + len(calls["db"])
+        return counts
+
+class StubLLM:
+    def __init__(self, recorded: Recorded):
+        self.recorded = recorded
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        call = await self.recorded.next("llm")
+        usage = SimpleNamespace(**call["usage"]) if call.get("usage") else None
+        message = SimpleNamespace(content=call["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+class StubConnection:
+    def __init__(self, recorded: Recorded):
+        self.recorded = recorded
+
+    async def _call(self, method: str):
+        call = await self.recorded.next("db", method)
+        if call.get("error"):
+            raise getattr(asyncpg, call["error"], RuntimeError)(call["error"])
+        return call["result"]
+
+    async def execute(self, query: str, *args):
+        return await self._call("execute")
+
+    async def executemany(self, query: str, *args):
+        return await self._call("executemany")
+
+    async def fetch(self, query: str, *args):
+        return await self._call("fetch")
+
+    async def fetchrow(self, query: str, *args):
+        return await self._call("fetchrow")
+
+    async def fetchval(self, query: str, *args):
+        return await self._call("fetchval")
+
+class StubDatabase:
+    def __init__(self, recorded: Recorded):
+        self.recorded = recorded
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield tracing.trace_connection(StubConnection(self.recorded))
+
+async def replay(stages: List[Dict], latency_scale: float):
+    recorded = Recorded(stages, latency_scale)
+    llm = LLMGateway(StubLLM(recorded))
+    db = StubDatabase(recorded)
+    channel = A2AChannel()
+    transcript = ChatTranscript()
+
+    main_agent = MainAgent(channel, llm, transcript)
+    RegistrationAgent(channel, llm, transcript, db)
+    LoginAgent(channel, llm, transcript, db)
+    ProfileAgent(channel, llm, transcript, db)
+    HealthAgent(channel, llm, transcript)
+    LogoutAgent(channel, llm, transcript, db)
+
+    replayed: List[Dict] = []
+    tracing.recorder = tracing.TraceRecorder(sink=replayed.append)
+    route_mismatches = 0
+
+    # Mirrors stream_agent_chat without the pacing and SSE events
+    turns = sorted((stage for stage in stages if stage["agent"] == main_agent.agent_id), key=lambda s: s["ts"])
+    for stage in turns:
+        inputs = stage["inputs"]
+        session_id = inputs.get("session_id")
+        session_data = inputs.get("session_lookup") or inputs.get("session_data")
+
+        await transcript.activate(session_id, persist=bool(session_data and session_data.get("authenticated")))
+        transcript.add_message(session_id, "user", inputs["user_message"])
+        try:
+            result = await main_agent.process_with_streaming(
+                inputs["user_message"], session_data, session_id, stage["trace"], inputs.get("locale")
+            )
+        except ReplayMismatch:
+            continue
+
+        if result.get("routed_to") != (stage["output"] or {}).get("routed_to"):
+            route_mismatches += 1
+        if not result.get("routed_to"):
+            continue
+
+        try:
+            response = await channel.wait_reply(result["correlation_id"])
+        except ReplayMismatch:
+            continue
+        if response and response.get("session_id") and session_id not in transcript.transcripts:
+            transcript.promote(session_id, response["session_id"])
+
+    await channel.close()
+    return replayed, recorded, route_mismatches
+
+def external_ms(stage: Dict) -> float:
+    return sum(call["latency_ms"] for call in stage["llm"] + stage["db"])
+
+def summarize(recorded: List[Dict], replayed: List[Dict]) -> Dict:
+    report = {}
+    for agent_id in sorted({stage["agent"] for stage in replayed}):
+        before = [stage["duration_ms"] for stage in recorded if stage["agent"] == agent_id]
+        after = [stage for stage in replayed if stage["agent"] == agent_id]
+        own = sorted(stage["duration_ms"] - external_ms(stage) for stage in after)
+        report[agent_id] = {
+            "stages": len(after),
+            "recorded_ms": round(statistics.mean(before), 3) if before else None,
+            "replayed_ms": round(statistics.mean(stage["duration_ms"] for stage in after), 3),
+            "external_ms": round(statistics.mean(external_ms(stage) for stage in after), 3),
+            "own_ms": round(statistics.mean(own), 3),
+            "own_p95_ms": round(own[min(len(own) - 1, int(len(own) * 0.95))], 3)
+        }
+    return report
+
+def print_report(report: Dict, baseline: Dict = None):
+    print(f"{'stage':<20}{'n':>6}{'recorded':>12}{'replayed':>12}{'external':>12}{'own':>10}{'own p95':>10}")
+    for agent_id, row in report.items():
+        recorded = f"{row['recorded_ms']:.1f}" if row["recorded_ms"] is not None else "-"
+        print(f"{agent_id:<20}{row['stages']:>6}{recorded:>12}{row['replayed_ms']:>12.1f}"
+              f"{row['external_ms']:>12.1f}{row['own_ms']:>10.3f}{row['own_p95_ms']:>10.3f}")
+
+    if not baseline:
+        return
+    print()
+    print(f"{'stage':<20}{'own before':>12}{'own after':>12}{'delta':>10}{'change':>10}")
+    for agent_id in sorted(set(report) | set(baseline)):
+        before = baseline.get(agent_id, {}).get("own_ms")
+        after = report.get(agent_id, {}).get("own_ms")
+        if before is None or after is None:
+            print(f"{agent_id:<20}{before if before is not None else '-':>12}{after if after is not None else '-':>12}")
+            continue
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+        print(f"{agent_id:<20}{before:>12.3f}{after:>12.3f}{after - before:>+10.3f}{change:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded conversation traces")
+    parser.add_argument("trace_file")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--save", help="write the per-stage report as JSON")
+    parser.add_argument("--compare", help="diff against a report saved with --save")
+    args = parser.parse_args()
+
+    stages = load_stages(args.trace_file)
+    replayed, recorded, route_mismatches = asyncio.run(replay(stages, args.latency_scale))
+    report = summarize(stages, replayed)
+
+    print(f"stages recorded: {len(stages)}  replayed: {len(replayed)}")
+    print(f"route mismatches: {route_mismatches}  call mismatches: {sum(recorded.mismatches.values())}  "
+          f"unused recorded calls: {sum(recorded.unused().values())}")
+    print()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport saved to {args.save}")
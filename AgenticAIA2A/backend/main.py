@@ -3,20 +3,21 @@ ABC+ Fit Banker - Real-Time Agentic AI Chatbot with Streaming
 Multi-Agent System with A2A Protocol and Server-Sent Events (SSE)
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, List, AsyncGenerator
+from collections import OrderedDict
 import json
 from datetime import datetime, timedelta
-import asyncpg
 import hashlib
 import secrets
-from openai import AsyncOpenAI
+import importlib
+import ipaddress
 import os
 import asyncio
-from sse_starlette.sse import EventSourceResponse
+import time
 
 app = FastAPI(title="ABC+ Fit Banker AI System")
 
@@ -28,44 +29,155 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-client = AsyncOpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    base_url="https://openrouter.ai/api/v1"
-)
-
 DATABASE_URL = os.getenv("DATABASE_URL")
+STREAM_DELAY_SCALE = float(os.getenv("STREAM_DELAY_SCALE", "1"))
+RESET_DATABASE = os.getenv("RESET_DATABASE", "false").lower() in ("1", "true", "yes")
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()
+]
 
-from agents.a2a_protocol import A2AChannel, A2AMessage, ChatTranscript
+from agents.a2a_protocol import GUEST_PREFIX, A2AChannel, A2AMessage, ChatTranscript, is_guest, new_guest_id
+from agents.transcript_store import TranscriptStore
+from agents.summarizer import ConversationSummarizer
 from agents.main_agent import MainAgent
-from agents.registration_agent import RegistrationAgent
-from agents.login_agent import LoginAgent
-from agents.profile_agent import ProfileAgent
-from agents.health_agent import HealthAgent
-from agents.logout_agent import LogoutAgent
-
-a2a_channel = A2AChannel()
-chat_transcript = ChatTranscript()
-
-main_agent = MainAgent(a2a_channel, client, chat_transcript)
-registration_agent = RegistrationAgent(a2a_channel, client, chat_transcript, DATABASE_URL)
-login_agent = LoginAgent(a2a_channel, client, chat_transcript, DATABASE_URL)
-profile_agent = ProfileAgent(a2a_channel, client, chat_transcript, DATABASE_URL)
-health_agent = HealthAgent(a2a_channel, client, chat_transcript)
-logout_agent = LogoutAgent(a2a_channel, client, chat_transcript, DATABASE_URL)
+from agents.worker_pool import AgentProcessPool, default_client_factory
+from agents.db import Database
+from agents.llm_gateway import LLMGateway
+from agents.usage import UsageTracker
+from agents.templates import default_templates
+from agents.speculation import Speculator
+from agents.serializer import serializer
+from agents import tracing
+from streaming import DONE, THINKING, Turn, TurnManager, parse_event_id, sse_events, turn_id_for
+from admission import AdmissionController, AdmissionRejected
+from rate_limit import MemoryBuckets, PostgresBuckets, RateLimited, RateLimiter
+
+db = Database(DATABASE_URL, max_size=int(os.getenv("DB_POOL_SIZE", "10")))
+usage = UsageTracker(
+    db,
+    daily_budget=int(os.getenv("USER_DAILY_TOKEN_BUDGET", "0")),
+    daily_limit=int(os.getenv("USER_DAILY_TOKEN_LIMIT", "0")),
+    fallback_model=os.getenv("BUDGET_FALLBACK_MODEL", "openai/gpt-4o-mini"),
+    flush_interval=float(os.getenv("USAGE_FLUSH_INTERVAL", "10"))
+)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+llm = LLMGateway(
+    client_factory=default_client_factory,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    usage=usage
+)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+a2a_channel = A2AChannel(
+    max_queue_depth=int(os.getenv("A2A_MAX_QUEUE_DEPTH", "100")),
+    max_concurrency=int(os.getenv("A2A_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+)
+transcript_store = TranscriptStore(db, retention_days=int(os.getenv("TRANSCRIPT_RETENTION_DAYS", "30")))
+chat_transcript = ChatTranscript(
+    transcript_store,
+    max_active_sessions=int(os.getenv("TRANSCRIPT_MAX_ACTIVE_SESSIONS", "500")),
+    idle_timeout=float(os.getenv("TRANSCRIPT_IDLE_TIMEOUT", "1800")),
+    max_guest_sessions=int(os.getenv("TRANSCRIPT_MAX_GUEST_SESSIONS", "200")),
+    guest_idle_timeout=float(os.getenv("TRANSCRIPT_GUEST_IDLE_TIMEOUT", "300"))
+)
+summarizer = ConversationSummarizer(llm, chat_transcript)
+turn_manager = TurnManager(ttl=float(os.getenv("TURN_REPLAY_TTL", "120")))
+admission = AdmissionController(
+    llm, db,
+    max_turns={
+        "guest": int(os.getenv("ADMISSION_MAX_GUEST_TURNS", "20")),
+        "user": int(os.getenv("ADMISSION_MAX_USER_TURNS", "50"))
+    },
+    max_llm_queue=int(os.getenv("ADMISSION_MAX_LLM_QUEUE", "50")),
+    max_db_saturation=float(os.getenv("ADMISSION_MAX_DB_SATURATION", "2.0")),
+    retry_after=int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+)
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+rate_limiter = RateLimiter(
+    PostgresBuckets(db) if RATE_LIMIT_BACKEND == "postgres" else MemoryBuckets(),
+    limits={
+        "chat": (float(os.getenv("RATE_LIMIT_CHAT_PER_MINUTE", "30")) / 60,
+                 float(os.getenv("RATE_LIMIT_CHAT_BURST", "10"))),
+        "auth": (float(os.getenv("RATE_LIMIT_AUTH_PER_MINUTE", "5")) / 60,
+                 float(os.getenv("RATE_LIMIT_AUTH_BURST", "5")))
+    }
+)
+
+def lazy_agent(module: str, class_name: str, *args):
+    return lambda: getattr(importlib.import_module(f"agents.{module}"), class_name)(*args)
+
+a2a_channel.register_factory("registration_agent", lazy_agent("registration_agent", "RegistrationAgent", a2a_channel, llm, chat_transcript, db))
+a2a_channel.register_factory("login_agent", lazy_agent("login_agent", "LoginAgent", a2a_channel, llm, chat_transcript, db))
+a2a_channel.register_factory("profile_agent", lazy_agent("profile_agent", "ProfileAgent", a2a_channel, llm, chat_transcript, db))
+a2a_channel.register_factory("health_agent", lazy_agent("health_agent", "HealthAgent", a2a_channel, llm, chat_transcript))
+a2a_channel.register_factory("logout_agent", lazy_agent("logout_agent", "LogoutAgent", a2a_channel, llm, chat_transcript, db))
+
+AGENT_EXECUTION_MODE = os.getenv("AGENT_EXECUTION_MODE", "inline")
+agent_pool = None
+if AGENT_EXECUTION_MODE == "process":
+    agent_pool = AgentProcessPool(
+        DATABASE_URL,
+        processes=int(os.getenv("AGENT_WORKER_PROCESSES", "0")) or None,
+        timeout=float(os.getenv("AGENT_WORKER_TIMEOUT", "60"))
+    )
+    agent_pool.attach(a2a_channel, chat_transcript, usage=usage)
+
+speculator = None
+if os.getenv("SPECULATIVE_EXECUTION", "false").lower() in ("1", "true", "yes"):
+    speculator = Speculator(
+        llm, a2a_channel,
+        [] if agent_pool else ["registration_agent", "login_agent", "profile_agent", "health_agent"]
+    )
+
+main_agent = MainAgent(a2a_channel, llm, chat_transcript, speculator=speculator, usage=usage)
 
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
+    request_id: Optional[str] = None
+    guest_id: Optional[str] = None
+    locale: Optional[str] = None
 
-async def get_db():
-    return await asyncpg.connect(DATABASE_URL)
+# Recent session lookups, valid or not; admission and WebSocket turns reuse them for SESSION_CACHE_TTL
+session_cache: OrderedDict = OrderedDict()
+
+def cache_session(session_id: str, session_data: Optional[Dict]):
+    session_cache[session_id] = (time.monotonic(), session_data)
+    session_cache.move_to_end(session_id)
+    if len(session_cache) > 10000:
+        session_cache.popitem(last=False)
+
+def cached_session(session_id: Optional[str]):
+    entry = session_cache.get(session_id)
+    if entry is None or time.monotonic() - entry[0] >= SESSION_CACHE_TTL:
+        return False, None
+    return True, entry[1]
+
+def recently_valid(session_id: Optional[str]) -> bool:
+    return bool(cached_session(session_id)[1])
+
+async def lookup_session(session_id: Optional[str]) -> Optional[Dict]:
+    found, session_data = cached_session(session_id)
+    if found:
+        return session_data
+    return await get_user_from_session(session_id)
+
+async def session_tier(session_id: Optional[str]) -> str:
+    if is_guest(session_id):
+        return "guest"
+    try:
+        return "user" if await lookup_session(session_id) else "guest"
+    except Exception:
+        return "guest"
 
 async def get_user_from_session(session_id: str) -> Optional[Dict]:
-    if not session_id:
+    if is_guest(session_id):
         return None
     
-    conn = await get_db()
-    try:
+    async with db.acquire() as conn:
         user = await conn.fetchrow('''
             SELECT s.user_id, u.name, u.email,
                    EXISTS(SELECT 1 FROM user_profiles WHERE user_id = s.user_id) as has_profile
@@ -73,135 +185,367 @@ async def get_user_from_session(session_id: str) -> Optional[Dict]:
             JOIN users u ON s.user_id = u.user_id
             WHERE s.session_id = $1 AND s.expires_at > NOW()
         ''', session_id)
-        
-        if user:
-            return {
-                "user_id": user["user_id"],
-                "name": user["name"],
-                "email": user["email"],
-                "has_profile": user["has_profile"],
-                "authenticated": True
-            }
-        return None
-    finally:
-        await conn.close()
+    
+    session_data = {
+        "user_id": user["user_id"],
+        "name": user["name"],
+        "email": user["email"],
+        "has_profile": user["has_profile"],
+        "authenticated": True
+    } if user else None
+    cache_session(session_id, session_data)
+    return session_data
 
-@app.on_event("startup")
-async def startup():
-    conn = await get_db()
+async def init_database() -> bool:
     try:
-        await conn.execute('DROP TABLE IF EXISTS health_tracking CASCADE')
-        await conn.execute('DROP TABLE IF EXISTS sessions CASCADE')
-        await conn.execute('DROP TABLE IF EXISTS user_profiles CASCADE')
-        await conn.execute('DROP TABLE IF EXISTS users CASCADE')
-
-        await conn.execute('''
-            CREATE TABLE users (
-                user_id SERIAL PRIMARY KEY,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                phone VARCHAR(20) UNIQUE,
-                password_hash VARCHAR(255) NOT NULL,
-                name VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        await conn.execute('''
-            CREATE TABLE user_profiles (
-                profile_id SERIAL PRIMARY KEY,
-                user_id INTEGER UNIQUE REFERENCES users(user_id) ON DELETE CASCADE,
-                age INTEGER,
-                gender VARCHAR(50),
-                height_cm FLOAT,
-                weight_kg FLOAT,
-                activity_level VARCHAR(50),
-                diet_preference VARCHAR(100),
-                health_goals TEXT[],
-                health_conditions TEXT[],
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        await conn.execute('''
-            CREATE TABLE sessions (
-                session_id VARCHAR(255) PRIMARY KEY,
-                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP
-            )
-        ''')
-
-        await conn.execute('''
-            CREATE TABLE health_tracking (
-                tracking_id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
-                tracking_type VARCHAR(50),
-                data JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        async with db.acquire() as conn:
+            if RESET_DATABASE:
+                await conn.execute('DROP TABLE IF EXISTS health_tracking CASCADE')
+                await conn.execute('DROP TABLE IF EXISTS sessions CASCADE')
+                await conn.execute('DROP TABLE IF EXISTS user_profiles CASCADE')
+                await conn.execute('DROP TABLE IF EXISTS users CASCADE')
+
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id SERIAL PRIMARY KEY,
+                    email VARCHAR(255) UNIQUE NOT NULL,
+                    phone VARCHAR(20) UNIQUE,
+                    password_hash VARCHAR(255) NOT NULL,
+                    name VARCHAR(255),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS user_profiles (
+                    profile_id SERIAL PRIMARY KEY,
+                    user_id INTEGER UNIQUE REFERENCES users(user_id) ON DELETE CASCADE,
+                    age INTEGER,
+                    gender VARCHAR(50),
+                    height_cm FLOAT,
+                    weight_kg FLOAT,
+                    activity_level VARCHAR(50),
+                    diet_preference VARCHAR(100),
+                    health_goals TEXT[],
+                    health_conditions TEXT[],
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id VARCHAR(255) PRIMARY KEY,
+                    user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP
+                )
+            ''')
+
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS health_tracking (
+                    tracking_id SERIAL PRIMARY KEY,
+                    user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                    tracking_type VARCHAR(50),
+                    data JSONB,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            await transcript_store.ensure_schema(conn)
+            await usage.ensure_schema(conn)
+            if RATE_LIMIT_BACKEND == "postgres":
+                await rate_limiter.buckets.ensure_schema(conn)
 
         print("✅ Database initialized successfully")
+        return True
     except Exception as e:
         print(f"❌ Database error: {e}")
-    finally:
-        await conn.close()
+        return False
+
+async def warm_up():
+    database_ready, _ = await asyncio.gather(init_database(), asyncio.to_thread(lambda: llm.client))
+    app.state.ready = database_ready
 
-async def stream_agent_chat(user_message: str, session_id: str) -> AsyncGenerator[str, None]:
-    session_data = await get_user_from_session(session_id) if session_id else None
+@app.on_event("startup")
+async def startup():
+    app.state.ready = False
+    app.state.warmup = asyncio.create_task(warm_up())
+    app.state.transcript_flusher = asyncio.create_task(transcript_store.run())
+    app.state.usage_flusher = asyncio.create_task(usage.run())
     
+    if agent_pool:
+        agent_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.warmup.cancel()
+    app.state.transcript_flusher.cancel()
+    app.state.usage_flusher.cancel()
+    await a2a_channel.close()
+    if agent_pool:
+        agent_pool.shutdown()
+    await transcript_store.flush()
+    await usage.flush()
+    await db.close()
+    tracing.recorder.close()
+
+async def pace(seconds: float):
+    if STREAM_DELAY_SCALE:
+        await asyncio.sleep(seconds * STREAM_DELAY_SCALE)
+
+async def stream_agent_chat(turn: Turn, user_message: str, session_id: str,
+                            session_data: Optional[Dict] = None, resolve_session: bool = True,
+                            locale: Optional[str] = None, announce_guest: bool = False):
+    if announce_guest:
+        turn.emit({"type": "guest_session", "guest_id": session_id})
+    
+    session_lookup = None
+    if resolve_session:
+        # Only overlap the lookup for sessions seen valid recently; unknown ids are checked first
+        if speculator and recently_valid(session_id):
+            session_lookup = asyncio.ensure_future(get_user_from_session(session_id))
+        else:
+            session_data = await get_user_from_session(session_id)
+    
+    # Unvalidated session ids are neither persisted, loaded nor summarised
+    authenticated = session_lookup is not None or bool(session_data and session_data.get("authenticated"))
+    await chat_transcript.activate(session_id, persist=authenticated)
     chat_transcript.add_message(session_id, "user", user_message)
     
-    yield f"data: {json.dumps({'type': 'user_message', 'message': user_message})}\n\n"
+    correlation_id = f"{session_id or 'guest'}:{secrets.token_hex(8)}"
+    routing = None
+    if speculator:
+        routing = asyncio.ensure_future(main_agent.process_with_streaming(
+            user_message, session_data, session_id, correlation_id, locale, session_lookup
+        ))
+    
+    turn.emit({"type": "user_message", "message": user_message})
     
-    await asyncio.sleep(0.3)
+    await pace(0.3)
     
-    yield f"data: {json.dumps({'type': 'agent_thinking', 'message': '🤔 Processing your request...'})}\n\n"
+    turn.emit_static(THINKING)
     
-    await asyncio.sleep(0.5)
+    await pace(0.5)
     
-    result = await main_agent.process_with_streaming(user_message, session_data, session_id)
+    if routing:
+        result = await routing
+    else:
+        result = await main_agent.process_with_streaming(
+            user_message, session_data, session_id, correlation_id, locale
+        )
     
     if result.get("stream_messages"):
         for msg in result["stream_messages"]:
-            yield f"data: {json.dumps({'type': 'agent_message', 'message': msg['content'], 'agent': msg.get('agent', 'main_agent')})}\n\n"
-            await asyncio.sleep(0.6)
+            turn.emit({"type": "agent_message", "message": msg["content"], "agent": msg.get("agent", "main_agent")})
+            await pace(0.6)
     
+    status = None
     if result.get("routed_to"):
-        target_agent = result["routed_to"]
+        try:
+            response = await a2a_channel.wait_reply(result["correlation_id"])
+        except Exception as e:
+            print(f"❌ {result['routed_to']} error: {e}")
+            response = {"stream_messages": [{"content": "Sorry, something went wrong. Please try again."}]}
         
-        messages = a2a_channel.get_messages(target_agent)
-        
-        for a2a_msg in messages:
-            if target_agent == "registration_agent":
-                response = await registration_agent.process_with_streaming(a2a_msg)
-            elif target_agent == "login_agent":
-                response = await login_agent.process_with_streaming(a2a_msg)
-            elif target_agent == "profile_agent":
-                response = await profile_agent.process_with_streaming(a2a_msg)
-            elif target_agent == "health_agent":
-                response = await health_agent.process_with_streaming(a2a_msg)
-            elif target_agent == "logout_agent":
-                response = await logout_agent.process_with_streaming(a2a_msg)
-            
+        if response:
+            status = response.get("status")
+            if status == "logged_out" and not is_guest(session_id):
+                cache_session(session_id, None)
+                usage.end_session(session_id)
             if response.get("stream_messages"):
                 for msg in response["stream_messages"]:
-                    yield f"data: {json.dumps({'type': 'agent_message', 'message': msg['content'], 'agent': 'main_agent'})}\n\n"
-                    await asyncio.sleep(0.6)
+                    turn.emit({"type": "agent_message", "message": msg["content"], "agent": "main_agent"})
+                    await pace(0.6)
             
             if response.get("session_id"):
-                yield f"data: {json.dumps({'type': 'session_update', 'session_id': response['session_id']})}\n\n"
+                if not authenticated:
+                    chat_transcript.promote(session_id, response["session_id"])
+                turn.emit({"type": "session_update", "session_id": response["session_id"]})
+    
+    main_agent.observe(session_id, result.get("routed_to"), status)
+    if speculator:
+        speculator.observe(session_id, correlation_id, result.get("routed_to"), status)
     
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    if authenticated:
+        summarizer.schedule(session_id)
+    
+    turn.emit_static(DONE)
+
+def is_trusted_proxy(host: Optional[str]) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except (TypeError, ValueError):
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def client_ip(headers, client) -> Optional[str]:
+    host = client.host if client else None
+    if not is_trusted_proxy(host):
+        return host
+    
+    # Walk X-Forwarded-For from the nearest hop; the first untrusted address is the client
+    for hop in reversed([hop.strip() for hop in headers.get("x-forwarded-for", "").split(",") if hop.strip()]):
+        try:
+            ipaddress.ip_address(hop)
+        except ValueError:
+            break
+        if not is_trusted_proxy(hop):
+            return hop
+        host = hop
+    return host
+
+async def start_turn(turn_id: str, session_id: Optional[str], message: str, ip: Optional[str], producer) -> Turn:
+    tier = None
+    if not turn_manager.get(turn_id):
+        await rate_limiter.check(ip, session_id, message, main_agent.auth_flow(session_id) is not None)
+        # A made-up session_id must not draw on the signed-in quota
+        tier = await session_tier(session_id)
+    
+    turn, _ = turn_manager.get_or_start(
+        turn_id,
+        admission.track(tier, producer),
+        lambda: admission.admit(tier)
+    )
+    return turn
 
 @app.post("/api/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(request: ChatRequest, http_request: Request):
+    turn_id, last_seq = parse_event_id(http_request.headers.get("last-event-id"))
+    turn = turn_manager.get(turn_id) if turn_id else None
+    
+    if not turn:
+        ip = client_ip(http_request.headers, http_request.client)
+        session_id = request.session_id
+        issued_guest = False
+        if not session_id:
+            if request.guest_id and request.guest_id.startswith(GUEST_PREFIX):
+                session_id = request.guest_id
+            else:
+                session_id = new_guest_id()
+                issued_guest = True
+        
+        # request_id is client-chosen; without a session, scope it to the caller's address so a
+        # retry replays its own turn (and guest_session) but another client's id cannot collide
+        dedup_scope = f"ip:{ip}" if issued_guest else session_id
+        new_turn_id = (turn_id_for(dedup_scope, request.request_id)
+                       if request.request_id else secrets.token_urlsafe(12))
+        try:
+            turn = await start_turn(
+                new_turn_id, session_id, request.message, ip,
+                lambda t: stream_agent_chat(
+                    t, request.message, session_id, locale=request.locale, announce_guest=issued_guest
+                )
+            )
+        except RateLimited as e:
+            return JSONResponse(
+                status_code=429,
+                content={"error": "rate_limited", "scope": e.scope, "retry_after": e.retry_after},
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except AdmissionRejected as e:
+            return JSONResponse(
+                status_code=503,
+                content={"error": "overloaded", "reason": e.reason, "retry_after": e.retry_after},
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        last_seq = -1
+    
+    from sse_starlette.sse import EventSourceResponse
+    return EventSourceResponse(
+        sse_events(turn, last_seq),
+        media_type="text/event-stream"
+    )
+
+@app.get("/api/chat/stream/{turn_id}")
+async def resume_chat_stream(turn_id: str, http_request: Request, last_event_id: Optional[str] = None):
+    event_turn_id, last_seq = parse_event_id(http_request.headers.get("last-event-id") or last_event_id)
+    turn = turn_manager.get(turn_id)
+    
+    if not turn:
+        raise HTTPException(status_code=404, detail="Turn not found or expired")
+    if event_turn_id != turn_id:
+        last_seq = -1
+    
+    from sse_starlette.sse import EventSourceResponse
     return EventSourceResponse(
-        stream_agent_chat(request.message, request.session_id),
+        sse_events(turn, last_seq),
         media_type="text/event-stream"
     )
 
+@app.websocket("/api/chat/ws")
+async def chat_websocket(websocket: WebSocket, session_id: Optional[str] = None):
+    await websocket.accept()
+    
+    state = {"session_id": session_id or new_guest_id()}
+    session_data = await get_user_from_session(session_id)
+    send_lock = asyncio.Lock()
+    forwarders = set()
+    
+    async def send(payload: Dict):
+        async with send_lock:
+            await websocket.send_text(serializer.dumps(payload).decode())
+    
+    async def forward(turn: Turn, request_id: Optional[str], after: int = -1):
+        async for seq, event in turn.follow(after):
+            if event["type"] == "session_update":
+                state["session_id"] = event["session_id"]
+            await send({**event, "id": f"{turn.turn_id}:{seq}", "request_id": request_id})
+    
+    def make_producer(message: str, sid: Optional[str], locale: Optional[str]):
+        async def produce(t: Turn):
+            # Re-checked every turn (through the short-lived cache) so logout and expiry apply to an open socket
+            session_data = await lookup_session(sid)
+            await stream_agent_chat(t, message, sid, session_data, resolve_session=False, locale=locale)
+        return produce
+    
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        forwarders.add(task)
+        task.add_done_callback(forwarders.discard)
+    
+    await send({
+        "type": "connected",
+        "authenticated": bool(session_data),
+        "guest_id": state["session_id"] if is_guest(state["session_id"]) else None
+    })
+    
+    try:
+        while True:
+            data = await websocket.receive_json()
+            
+            if data.get("type") == "resume":
+                turn_id, last_seq = parse_event_id(data.get("last_event_id"))
+                turn = turn_manager.get(turn_id) if turn_id else None
+                if turn:
+                    spawn(forward(turn, data.get("request_id"), last_seq))
+                else:
+                    await send({"type": "error", "message": "Turn not found or expired", "request_id": data.get("request_id")})
+                continue
+            
+            if not data.get("message"):
+                continue
+            
+            request_id = data.get("request_id") or secrets.token_urlsafe(12)
+            try:
+                turn = await start_turn(
+                    turn_id_for(state["session_id"], request_id), state["session_id"], data["message"],
+                    client_ip(websocket.headers, websocket.client),
+                    make_producer(data["message"], state["session_id"], data.get("locale"))
+                )
+            except RateLimited as e:
+                await send({"type": "rate_limited", "scope": e.scope, "retry_after": e.retry_after, "request_id": request_id})
+                continue
+            except AdmissionRejected as e:
+                await send({"type": "overloaded", "reason": e.reason, "retry_after": e.retry_after, "request_id": request_id})
+                continue
+            spawn(forward(turn, request_id))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in list(forwarders):
+            task.cancel()
+
 @app.get("/api/session/{session_id}")
 async def get_session(session_id: str):
     user_data = await get_user_from_session(session_id)
@@ -209,9 +553,48 @@ async def get_session(session_id: str):
         return user_data
     return {"authenticated": False}
 
+@app.get("/api/metrics")
+async def metrics():
+    return {
+        "a2a": a2a_channel.get_metrics(),
+        "turns": turn_manager.get_metrics(),
+        "admission": admission.get_metrics(),
+        "rate_limit": rate_limiter.get_metrics(),
+        "llm": llm.get_metrics(),
+        "transcripts": chat_transcript.get_metrics(),
+        "templates": default_templates.get_metrics(),
+        "speculation": speculator.get_metrics() if speculator else None,
+        "tracing": tracing.recorder.get_metrics(),
+        "usage": usage.get_metrics(),
+        "db": db.get_metrics()
+    }
+
+@app.get("/api/admin/usage")
+async def admin_usage(http_request: Request, limit: int = 20, days: int = 7):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    authorization = http_request.headers.get("authorization", "")
+    if not secrets.compare_digest(authorization, f"Bearer {ADMIN_TOKEN}"):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+    try:
+        history = await usage.history(days)
+    except Exception as e:
+        print(f"❌ Usage history error: {e}")
+        history = None
+
+    return {**usage.get_stats(limit), "history": history}
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "agents": len(a2a_channel.agent_cards)}
+    return {"status": "healthy", "agents": len(a2a_channel.agent_cards) + len(a2a_channel.factories)}
+
+@app.get("/ready")
+async def readiness_check():
+    if app.state.ready:
+        return {"status": "ready"}
+    status = "failed" if app.state.warmup.done() else "starting"
+    return JSONResponse(status_code=503, content={"status": status})
 
 @app.get("/")
 async def root():
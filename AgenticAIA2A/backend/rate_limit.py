@@ -0,0 +1,137 @@
+"""
+Rate Limiting - Token buckets keyed by IP, session and login identifier
+In-memory buckets for a single worker, Postgres-backed buckets for several
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import math
+import re
+import time
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s-]{8,}\d")
+AUTH_PATTERN = re.compile(r"\b(log ?in|sign ?in|sign ?up|register|password|passcode)\b", re.IGNORECASE)
+
+class RateLimited(Exception):
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(f"Rate limited: {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+class MemoryBuckets:
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.buckets: OrderedDict = OrderedDict()
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        if tokens >= 1:
+            self.buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self.buckets[key] = (tokens, now)
+            wait = (1 - tokens) / rate
+
+        if len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return wait
+
+class PostgresBuckets:
+    def __init__(self, db, prune_every: int = 1000, idle_seconds: int = 86400):
+        self.db = db
+        self.prune_every = prune_every
+        self.idle_seconds = idle_seconds
+        self.calls = 0
+
+    async def ensure_schema(self, conn):
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                bucket_key VARCHAR(255) PRIMARY KEY,
+                tokens DOUBLE PRECISION NOT NULL,
+                updated_at DOUBLE PRECISION NOT NULL
+            )
+        ''')
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        self.calls += 1
+        async with self.db.acquire() as conn:
+            tokens = await conn.fetchval('''
+                INSERT INTO rate_limits (bucket_key, tokens, updated_at)
+                VALUES ($1, $3 - 1, EXTRACT(EPOCH FROM clock_timestamp()))
+                ON CONFLICT (bucket_key) DO UPDATE SET
+                    tokens = LEAST($3, rate_limits.tokens
+                        + (EXTRACT(EPOCH FROM clock_timestamp()) - rate_limits.updated_at) * $2) - 1,
+                    updated_at = EXTRACT(EPOCH FROM clock_timestamp())
+                WHERE LEAST($3, rate_limits.tokens
+                    + (EXTRACT(EPOCH FROM clock_timestamp()) - rate_limits.updated_at) * $2) >= 1
+                RETURNING tokens
+            ''', key, rate, capacity)
+
+            if self.calls % self.prune_every == 0:
+                await conn.execute('''
+                    DELETE FROM rate_limits
+                    WHERE updated_at < EXTRACT(EPOCH FROM clock_timestamp()) - $1
+                ''', self.idle_seconds)
+
+        return 0.0 if tokens is not None else 1 / rate
+
+class RateLimiter:
+    def __init__(self, buckets, limits: Dict[str, Tuple[float, float]], max_sessions: int = 100000):
+        self.buckets = buckets
+        self.limits = limits
+        self.max_sessions = max_sessions
+        self.identifiers: OrderedDict = OrderedDict()
+        self.allowed = 0
+        self.limited: Dict[str, int] = {}
+
+    def identifier_for(self, session_id: Optional[str], message: str, auth_flow: bool) -> Optional[str]:
+        match = EMAIL_PATTERN.search(message) or PHONE_PATTERN.search(message)
+        if match is None:
+            # A bare password later in the flow is an attempt against the identifier given earlier
+            return self.identifiers.get(session_id) if auth_flow and session_id else None
+
+        identifier = re.sub(r"[\s-]", "", match.group(0).lower())
+        if session_id:
+            self.identifiers[session_id] = identifier
+            self.identifiers.move_to_end(session_id)
+            if len(self.identifiers) > self.max_sessions:
+                self.identifiers.popitem(last=False)
+        return identifier
+
+    def keys_for(self, client_ip: Optional[str], session_id: Optional[str],
+                 message: str, auth_flow: bool = False) -> List[Tuple[str, str]]:
+        keys = [("chat", f"chat:ip:{client_ip}")]
+        if session_id:
+            keys.append(("chat", f"chat:session:{session_id}"))
+
+        identifier = self.identifier_for(session_id, message, auth_flow)
+        if identifier or auth_flow or AUTH_PATTERN.search(message):
+            keys.append(("auth", f"auth:ip:{client_ip}"))
+            if session_id:
+                keys.append(("auth", f"auth:session:{session_id}"))
+        if identifier:
+            keys.append(("auth", f"auth:id:{identifier}"))
+        return keys
+
+    async def check(self, client_ip: Optional[str], session_id: Optional[str], message: str,
+                    auth_flow: bool = False):
+        for scope, key in self.keys_for(client_ip, session_id, message, auth_flow):
+            rate, capacity = self.limits[scope]
+            try:
+                wait = await self.buckets.take(key, rate, capacity)
+            except Exception as e:
+                print(f"❌ Rate limiter error: {e}")
+                continue
+
+            if wait > 0:
+                kind = ":".join(key.split(":", 2)[:2])
+                self.limited[kind] = self.limited.get(kind, 0) + 1
+                raise RateLimited(scope, math.ceil(wait))
+        self.allowed += 1
+
+    def get_metrics(self) -> Dict:
+        return {"allowed": self.allowed, "limited": dict(self.limited)}
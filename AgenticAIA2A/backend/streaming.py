@@ -0,0 +1,140 @@
+"""
+Turn Streaming - Buffered per-turn event logs for SSE resumption
+Each turn runs independently of the client connection so a reconnect can
+replay missed events (Last-Event-ID) and reattach to a turn in progress
+"""
+
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import time
+from agents.serializer import serializer
+
+class StaticEvent:
+    def __init__(self, event: Dict):
+        self.event = event
+        self.data = serializer.dumps(event)
+
+DONE = StaticEvent({"type": "done"})
+THINKING = StaticEvent({"type": "agent_thinking", "message": "🤔 Processing your request..."})
+
+class Turn:
+    def __init__(self, turn_id: str):
+        self.turn_id = turn_id
+        self.events: List[Dict] = []
+        self.encoded: List[Optional[bytes]] = []
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.updated = asyncio.Event()
+
+    def _notify(self):
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+    def emit(self, event: Dict, data: bytes = None):
+        self.events.append(event)
+        self.encoded.append(data)
+        self._notify()
+
+    def emit_static(self, static: StaticEvent):
+        self.emit(static.event, static.data)
+
+    def data(self, seq: int) -> bytes:
+        if self.encoded[seq] is None:
+            self.encoded[seq] = serializer.dumps(self.events[seq])
+        return self.encoded[seq]
+
+    def finish(self):
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    async def follow(self, after: int = -1) -> AsyncGenerator[Tuple[int, Dict], None]:
+        seq = after + 1
+        while True:
+            while seq < len(self.events):
+                yield seq, self.events[seq]
+                seq += 1
+            if self.done:
+                return
+            await self.updated.wait()
+
+class TurnManager:
+    def __init__(self, ttl: float = 120):
+        self.ttl = ttl
+        self.turns: Dict[str, Turn] = {}
+        self.tasks = set()
+        self.started = 0
+        self.deduplicated = 0
+
+    def get(self, turn_id: str) -> Optional[Turn]:
+        self.prune()
+        return self.turns.get(turn_id)
+
+    def start(self, turn_id: str, producer: Callable[[Turn], Awaitable]) -> Turn:
+        self.prune()
+        turn = Turn(turn_id)
+        self.turns[turn_id] = turn
+        self.started += 1
+
+        task = asyncio.create_task(self._run(turn, producer))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return turn
+
+    def get_or_start(self, turn_id: str, producer: Callable[[Turn], Awaitable],
+                     admit: Callable[[], None] = None) -> Tuple[Turn, bool]:
+        turn = self.get(turn_id)
+        if turn:
+            self.deduplicated += 1
+            return turn, False
+        if admit:
+            admit()
+        return self.start(turn_id, producer), True
+
+    async def _run(self, turn: Turn, producer: Callable[[Turn], Awaitable]):
+        try:
+            await producer(turn)
+        except Exception as e:
+            print(f"❌ Turn {turn.turn_id} error: {e}")
+            turn.emit({"type": "agent_message", "message": "Sorry, something went wrong. Please try again.", "agent": "main_agent"})
+            turn.emit_static(DONE)
+        finally:
+            turn.finish()
+
+    def prune(self):
+        cutoff = time.monotonic() - self.ttl
+        expired = [
+            turn_id for turn_id, turn in self.turns.items()
+            if turn.done and turn.finished_at < cutoff
+        ]
+        for turn_id in expired:
+            del self.turns[turn_id]
+
+    def in_flight(self) -> int:
+        return sum(1 for turn in self.turns.values() if not turn.done)
+
+    def get_metrics(self) -> Dict:
+        return {
+            "in_flight": self.in_flight(),
+            "buffered": len(self.turns),
+            "started": self.started,
+            "deduplicated": self.deduplicated
+        }
+
+def turn_id_for(session_id: Optional[str], request_id: str) -> str:
+    return hashlib.sha256(f"{session_id or 'guest'}:{request_id}".encode()).hexdigest()[:24]
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], int]:
+    if not event_id or ":" not in event_id:
+        return None, -1
+    turn_id, _, seq = event_id.rpartition(":")
+    try:
+        return turn_id, int(seq)
+    except ValueError:
+        return None, -1
+
+async def sse_events(turn: Turn, after: int = -1) -> AsyncGenerator[bytes, None]:
+    prefix = f"id: {turn.turn_id}:".encode()
+    async for seq, _ in turn.follow(after):
+        yield b"".join((prefix, str(seq).encode(), b"\r\ndata: ", turn.data(seq), b"\r\n\r\n"))
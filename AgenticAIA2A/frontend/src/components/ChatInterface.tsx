@@ -23,6 +23,7 @@ export default function ChatInterface({ sessionId, onSessionUpdate }: ChatInterf
   ])
   const [input, setInput] = useState('')
   const [isLoading, setIsLoading] = useState(false)
+  const [guestId, setGuestId] = useState<string | null>(null)
   const messagesEndRef = useRef<HTMLDivElement>(null)
 
   const scrollToBottom = () => {
@@ -47,57 +48,108 @@ export default function ChatInterface({ sessionId, onSessionUpdate }: ChatInterf
     setInput('')
     setIsLoading(true)
 
-    try {
-      const response = await fetch('http://localhost:8000/api/chat/stream', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          message: input,
-          session_id: sessionId
-        })
-      })
-
-      if (!response.body) {
-        throw new Error('No response body')
+    const handleEvent = (data: any) => {
+      if (data.type === 'agent_message') {
+        const agentMessage: Message = {
+          id: `agent-${Date.now()}-${Math.random()}`,
+          content: data.message,
+          role: 'assistant',
+          timestamp: new Date()
+        }
+        setMessages(prev => [...prev, agentMessage])
+      } else if (data.type === 'agent_thinking') {
+        const thinkingMessage: Message = {
+          id: `thinking-${Date.now()}`,
+          content: data.message,
+          role: 'system',
+          timestamp: new Date()
+        }
+        setMessages(prev => [...prev, thinkingMessage])
+      } else if (data.type === 'session_update') {
+        onSessionUpdate(data.session_id)
+      } else if (data.type === 'guest_session') {
+        setGuestId(data.guest_id)
       }
+    }
 
-      const reader = response.body.getReader()
-      const decoder = new TextDecoder()
+    const requestId = crypto.randomUUID()
+    let lastEventId: string | null = null
+    let finished = false
 
-      while (true) {
-        const { done, value } = await reader.read()
-        
-        if (done) break
+    try {
+      for (let attempt = 0; attempt < 3 && !finished; attempt++) {
+        try {
+          const headers: Record<string, string> = {
+            'Content-Type': 'application/json',
+          }
+          if (lastEventId) {
+            headers['Last-Event-ID'] = lastEventId
+          }
 
-        const chunk = decoder.decode(value)
-        const lines = chunk.split('\n\n')
+          const response = await fetch('http://localhost:8000/api/chat/stream', {
+            method: 'POST',
+            headers,
+            body: JSON.stringify({
+              message: input,
+              session_id: sessionId,
+              guest_id: guestId,
+              request_id: requestId,
+              locale: navigator.language.split('-')[0]
+            })
+          })
+
+          if (response.status === 503 || response.status === 429) {
+            const retryAfter = response.headers.get('Retry-After')
+            handleEvent({
+              type: 'agent_message',
+              message: `We're experiencing high demand right now. Please try again in ${retryAfter || 'a few'} seconds.`
+            })
+            break
+          }
 
-        for (const line of lines) {
-          if (line.startsWith('data: ')) {
-            const data = JSON.parse(line.slice(6))
+          if (!response.body) {
+            throw new Error('No response body')
+          }
 
-            if (data.type === 'agent_message') {
-              const agentMessage: Message = {
-                id: `agent-${Date.now()}-${Math.random()}`,
-                content: data.message,
-                role: 'assistant',
-                timestamp: new Date()
+          const reader = response.body.getReader()
+          const decoder = new TextDecoder()
+          let buffer = ''
+
+          while (true) {
+            const { done, value } = await reader.read()
+
+            if (done) break
+
+            buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n')
+            const blocks = buffer.split('\n\n')
+            buffer = blocks.pop() || ''
+
+            for (const block of blocks) {
+              let data = null
+              for (const line of block.split('\n')) {
+                if (line.startsWith('id: ')) {
+                  lastEventId = line.slice(4)
+                } else if (line.startsWith('data: ')) {
+                  data = JSON.parse(line.slice(6))
+                }
               }
-              setMessages(prev => [...prev, agentMessage])
-            } else if (data.type === 'agent_thinking') {
-              const thinkingMessage: Message = {
-                id: `thinking-${Date.now()}`,
-                content: data.message,
-                role: 'system',
-                timestamp: new Date()
+
+              if (data) {
+                if (data.type === 'done') {
+                  finished = true
+                }
+                handleEvent(data)
               }
-              setMessages(prev => [...prev, thinkingMessage])
-            } else if (data.type === 'session_update') {
-              onSessionUpdate(data.session_id)
             }
           }
+
+          if (!lastEventId) {
+            break
+          }
+        } catch (error) {
+          if (!lastEventId || attempt === 2) {
+            throw error
+          }
         }
       }
     } catch (error) {